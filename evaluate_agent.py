@@ -1,7 +1,97 @@
+import os
 import json
 import argparse
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from src.agent import RagSqlAgent
-from evaluation import AgentEvaluator
+from evaluation import AgentEvaluator, EvaluationResult
+
+RESULTS_JSONL = "evaluation/evaluation_results.jsonl"
+CACHE_DIR = "evaluation/.cache"
+TIERS = ("tier1", "tier2", "tier3")
+
+
+def result_to_record(result: EvaluationResult) -> dict:
+    """Flatten an EvaluationResult into a JSON-serializable record."""
+    return {
+        "test_id": result.test_id,
+        "question": result.question,
+        "passed": result.passed,
+        "overall_score": result.overall_score,
+        "latency_seconds": result.latency_seconds,
+        "tier1_score": result.tier1_score,
+        "tier2_score": result.tier2_score,
+        "tier3_score": result.tier3_score,
+        "generated_sql": result.details.get("generated_sql", ""),
+        "response": result.details.get("response", "")[:500],
+        # Per-metric (score, detail) pairs, needed to rebuild the report
+        "tiers": {
+            tier: result.details[tier] for tier in TIERS if tier in result.details
+        },
+    }
+
+
+def record_to_result(record: dict) -> EvaluationResult:
+    """Rebuild an EvaluationResult (with truncated response) from a record."""
+    return EvaluationResult(
+        test_id=record["test_id"],
+        question=record["question"],
+        passed=record["passed"],
+        tier1_score=record["tier1_score"],
+        tier2_score=record["tier2_score"],
+        tier3_score=record["tier3_score"],
+        overall_score=record["overall_score"],
+        latency_seconds=record["latency_seconds"],
+        details={
+            "generated_sql": record["generated_sql"],
+            "response": record["response"],
+            **record.get("tiers", {}),
+        },
+    )
+
+
+def load_records(path: str) -> dict:
+    """Load completed records from a results JSONL file, keyed by test_id."""
+    records = {}
+    if not os.path.exists(path):
+        return records
+
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partial line from an interrupted run
+            if "test_id" in record:  # Skip the run metadata header
+                records[record["test_id"]] = record
+    return records
+
+
+def load_run_metadata(path: str) -> dict | None:
+    """Return the model/reasoning header of a results JSONL file, if any."""
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "r") as f:
+        try:
+            header = json.loads(f.readline())
+        except json.JSONDecodeError:
+            return None
+    return header.get("metadata") if isinstance(header, dict) else None
+
+
+def evaluate_client(evaluator, client_id, test_cases, model, reasoning, save_result):
+    """Evaluate one client's test cases serially on a dedicated agent."""
+    print(f"\nInitializing agent for client {client_id} using model {model}...")
+    agent = RagSqlAgent(client_id=client_id, model_name=model, reasoning=reasoning)
+
+    # evaluate_test_case resets the conversation, so cases stay independent
+    try:
+        for test_case in test_cases:
+            save_result(evaluator.evaluate_test_case(agent, test_case))
+    finally:
+        agent.close()
 
 
 def main():
@@ -14,6 +104,23 @@ def main():
     parser.add_argument(
         "--reasoning", action="store_true", help="Enable reasoning mode"
     )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=f"Skip test cases already recorded in {RESULTS_JSONL}",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Clients evaluated in parallel; above 1 they share the Ollama "
+        "server, which inflates per-test latency",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Do not reuse golden SQL results cached in {CACHE_DIR}",
+    )
     args = parser.parse_args()
 
     print(f"SQL-RAG Agent Evaluation Framework (Model: {args.model})")
@@ -25,35 +132,88 @@ def main():
 
     print(f"Loaded {len(test_cases)} test cases")
 
-    # Initialize evaluator
-    evaluator = AgentEvaluator(db_path="transactions.db")
+    # Their golden outputs predate the ISO txn_date migration and would score
+    # the agent against stale rows until refresh_golden rebuilds them
+    pending = [
+        tc["test_id"] for tc in test_cases if tc.get("golden_pending_regeneration")
+    ]
+    if pending:
+        print(f"Skipping test cases pending golden regeneration: {', '.join(pending)}")
+        test_cases = [
+            tc for tc in test_cases if not tc.get("golden_pending_regeneration")
+        ]
+
+    # Latencies are only comparable between runs at the same concurrency
+    run_metadata = {
+        "model": args.model,
+        "reasoning": args.reasoning,
+        "concurrency": args.concurrency,
+    }
+    completed = set(load_records(RESULTS_JSONL)) if args.resume else set()
+    metadata = load_run_metadata(RESULTS_JSONL) if args.resume else None
+    if (completed or metadata is not None) and metadata != run_metadata:
+        # Mixing configurations would silently corrupt the report
+        parser.error(
+            f"{RESULTS_JSONL} was not written with {run_metadata}; "
+            "rerun without --resume to start over"
+        )
+    if completed:
+        print(f"Resuming: skipping {len(completed)} completed test cases")
 
-    # Run evaluations
-    results = []
-    current_client_id = None
-    agent = None
+    # Initialize evaluator
+    evaluator = AgentEvaluator(
+        db_path="transactions.db", cache_dir=None if args.no_cache else CACHE_DIR
+    )
 
+    # Group test cases by client so each agent is built once. With
+    # --concurrency above 1, clients are evaluated in parallel.
+    groups = defaultdict(list)
     for test_case in test_cases:
-        # Reinitialize agent if client_id changes
-        if test_case["client_id"] != current_client_id:
-            current_client_id = test_case["client_id"]
-            print(
-                f"\nInitializing agent for client {current_client_id} using model {args.model}..."
-            )
-            agent = RagSqlAgent(
-                client_id=current_client_id,
-                model_name=args.model,
-                reasoning=args.reasoning,
-            )
-        elif hasattr(agent, "reset_conversation"):
-            # Prevent cross-test contamination for same client_id
-            agent.reset_conversation()
-
-        result = evaluator.evaluate_test_case(agent, test_case)
-        results.append(result)
+        if test_case["test_id"] not in completed:
+            groups[test_case["client_id"]].append(test_case)
+
+    # Each result is appended as soon as it completes, so an interrupted run
+    # loses at most the in-flight cases and can be continued with --resume.
+    write_lock = threading.Lock()
+    with open(RESULTS_JSONL, "a" if args.resume else "w") as results_file:
+        # The header lets --resume check that it continues the same run
+        if results_file.tell() == 0:
+            results_file.write(json.dumps({"metadata": run_metadata}) + "\n")
+
+        def save_result(result: EvaluationResult):
+            line = json.dumps(result_to_record(result))
+            with write_lock:
+                results_file.write(line + "\n")
+                results_file.flush()
+
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            futures = [
+                executor.submit(
+                    evaluate_client,
+                    evaluator,
+                    client_id,
+                    client_cases,
+                    args.model,
+                    args.reasoning,
+                    save_result,
+                )
+                for client_id, client_cases in groups.items()
+            ]
+            for future in as_completed(futures):
+                future.result()
+
+    # Rebuild results in ground-truth order from the compact records
+    records = load_records(RESULTS_JSONL)
+    results = [
+        record_to_result(records[tc["test_id"]])
+        for tc in test_cases
+        if tc["test_id"] in records
+    ]
 
     # Generate and save report
-    report = evaluator.generate_report(results, model_name=args.model)
+    report = evaluator.generate_report(
+        results, model_name=args.model, concurrency=args.concurrency
+    )
     print(report)
 
     with open("evaluation/evaluation_report.txt", "w") as f:
@@ -63,24 +223,13 @@ def main():
 
     # Save detailed results as JSON
     results_dict = [
-        {
-            "test_id": r.test_id,
-            "question": r.question,
-            "passed": r.passed,
-            "overall_score": r.overall_score,
-            "latency_seconds": r.latency_seconds,
-            "tier1_score": r.tier1_score,
-            "tier2_score": r.tier2_score,
-            "tier3_score": r.tier3_score,
-            "generated_sql": r.details.get("generated_sql", ""),
-            "response": r.details.get("response", "")[:500],
-        }
+        {key: value for key, value in result_to_record(r).items() if key != "tiers"}
         for r in results
     ]
 
     # Include metadata in JSON results
     results_output = {
-        "metadata": {"model": args.model, "reasoning": args.reasoning},
+        "metadata": run_metadata,
         "results": results_dict,
     }
 
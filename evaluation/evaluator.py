@@ -4,10 +4,14 @@ Main evaluation orchestrator.
 Coordinates all evaluation tiers and generates comprehensive reports.
 """
 
+import os
 import time
 import sys
 import io
-from typing import Dict, List
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
 
 from . import EvaluationResult
 from .extractors import AgentOutputExtractor
@@ -16,6 +20,112 @@ from .tier2_retrieval import RetrievalEvaluator
 from .tier3_response import ResponseEvaluator
 
 
+class _NullIO(io.TextIOBase):
+    """Text sink that discards everything written to it."""
+
+    def write(self, s: str) -> int:
+        return len(s)
+
+
+_NULL_IO = _NullIO()
+
+
+# Per-context stdout sink. A ContextVar rather than a threading.local, so
+# tools that LangGraph runs in its own (context-copying) thread pool are
+# silenced along with the agent run that invoked them.
+_stdout_sink: ContextVar[Optional[io.TextIOBase]] = ContextVar(
+    "_stdout_sink", default=None
+)
+
+
+class _ContextStdout(io.TextIOBase):
+    """sys.stdout stand-in that lets individual contexts divert their own output."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, s: str) -> int:
+        return (_stdout_sink.get() or self.stream).write(s)
+
+    def flush(self):
+        self.stream.flush()
+
+
+_stdout_lock = threading.Lock()
+_stdout_users = 0
+# Kept referenced after uninstalling: print() may still hold a borrowed
+# reference to the router in another thread.
+_stdout_router = None
+
+
+@contextmanager
+def _route_stdout(sink: io.TextIOBase):
+    """
+    Send stdout of the current context only to sink.
+
+    Swapping sys.stdout directly (or contextlib.redirect_stdout) is
+    process-wide, so concurrent agent runs would restore each other's
+    streams. Instead a shared router is installed while any context is
+    redirected, and each context (including threads that copied it) writes
+    to its own sink.
+    """
+    global _stdout_users, _stdout_router
+    with _stdout_lock:
+        if _stdout_users == 0:
+            if _stdout_router is None or _stdout_router.stream is not sys.stdout:
+                _stdout_router = _ContextStdout(sys.stdout)
+            sys.stdout = _stdout_router
+        _stdout_users += 1
+        router = _stdout_router
+
+    token = _stdout_sink.set(sink)
+    try:
+        yield
+    finally:
+        _stdout_sink.reset(token)
+        with _stdout_lock:
+            _stdout_users -= 1
+            if _stdout_users == 0:
+                sys.stdout = router.stream
+
+
+@contextmanager
+def _silence_stdout():
+    """
+    Discard stdout of the current context only.
+
+    Set EVAL_SHOW_AGENT_OUTPUT=1 to let agent output through for debugging.
+    """
+    if os.environ.get("EVAL_SHOW_AGENT_OUTPUT"):
+        yield
+        return
+
+    with _route_stdout(_NULL_IO):
+        yield
+
+
+# Serializes the buffered logs of concurrently evaluated test cases
+_log_lock = threading.Lock()
+
+
+@contextmanager
+def _buffered_stdout():
+    """
+    Hold the current context's stdout and print it in one piece at the end.
+
+    Clients are evaluated in parallel threads; buffering keeps each test
+    case's log contiguous instead of interleaving it line by line.
+    """
+    buffer = io.StringIO()
+    try:
+        with _route_stdout(buffer):
+            yield
+    finally:
+        with _log_lock:
+            sys.stdout.write(buffer.getvalue())
+            sys.stdout.flush()
+
+
 class AgentEvaluator:
     """
     Main evaluator that orchestrates all evaluation tiers.
@@ -26,9 +136,11 @@ class AgentEvaluator:
         evaluator.close()
     """
 
-    def __init__(self, db_path: str = "transactions.db"):
+    def __init__(
+        self, db_path: str = "transactions.db", cache_dir: Optional[str] = None
+    ):
         self.db_path = db_path
-        self.functional = FunctionalEvaluator(db_path)
+        self.functional = FunctionalEvaluator(db_path, cache_dir=cache_dir)
         self.retrieval = RetrievalEvaluator()
         self.response = ResponseEvaluator()
         self.extractor = AgentOutputExtractor()
@@ -37,6 +149,9 @@ class AgentEvaluator:
         """
         Evaluate a single test case.
 
+        The case's progress log is printed in one piece once it finishes, so
+        cases evaluated in parallel threads do not interleave.
+
         Args:
             agent: RagSqlAgent instance
             test_case: Dict with question, golden_sql, golden_output, etc.
@@ -44,6 +159,11 @@ class AgentEvaluator:
         Returns:
             EvaluationResult with scores and details
         """
+        with _buffered_stdout():
+            return self._evaluate_test_case(agent, test_case)
+
+    def _evaluate_test_case(self, agent, test_case: Dict) -> EvaluationResult:
+        """Evaluate a single test case, printing progress as it goes."""
 
         # Ensure evaluations are single-turn and independent (no conversation bleed).
         if hasattr(agent, "reset_conversation"):
@@ -59,11 +179,9 @@ class AgentEvaluator:
         print(f"Latency: {latency:.2f}s")
         print(f"\nAgent Response:\n{response[:300]}...")
 
-        # Extract structured data
-        generated_sql = self.extractor.extract_sql(result)
-        vector_calls = self.extractor.extract_vector_search_calls(result)
-        response_amounts = self.extractor.extract_amounts(response)
-        transaction_ids = self.extractor.extract_transaction_ids(response)
+        # Extract structured data in one pass over the messages
+        extracted = self.extractor.extract_all(result, response)
+        generated_sql = extracted.sql
 
         print(
             f"\nGenerated SQL:\n{generated_sql if generated_sql else 'No SQL extracted'}"
@@ -73,11 +191,13 @@ class AgentEvaluator:
         tier1_score, tier1_details = self._evaluate_tier1(generated_sql, test_case)
 
         # Tier 2: Retrieval Precision
-        tier2_score, tier2_details = self._evaluate_tier2(vector_calls, test_case)
+        tier2_score, tier2_details = self._evaluate_tier2(
+            extracted.vector_calls, test_case
+        )
 
         # Tier 3: Response Quality
         tier3_score, tier3_details = self._evaluate_tier3(
-            response, response_amounts, transaction_ids, test_case
+            response, extracted.amounts, extracted.transaction_ids, test_case
         )
 
         # Calculate overall score (weighted scoring)
@@ -111,12 +231,9 @@ class AgentEvaluator:
         )
 
     def _run_agent(self, agent, question: str):
-        """Run agent and capture response, result, and latency."""
-        old_stdout = sys.stdout
-        sys.stdout = io.StringIO()
-
+        """Run agent with its stdout silenced; return response, result, and latency."""
         start_time = time.time()
-        try:
+        with _silence_stdout():
             # Use stream with invoke=True for synchronous execution
             result = agent.stream(question, invoke=True, remember=False)
 
@@ -131,9 +248,7 @@ class AgentEvaluator:
                 except Exception:
                     pass
 
-        finally:
-            sys.stdout = old_stdout
-            latency = time.time() - start_time
+        latency = time.time() - start_time
 
         return response, result, latency
 
@@ -242,53 +357,49 @@ class AgentEvaluator:
         print(f"  Tier 3 (Response): {tier3:.1%}")
 
     def generate_report(
-        self, results: List[EvaluationResult], model_name: str = None
+        self,
+        results: List[EvaluationResult],
+        model_name: str = None,
+        concurrency: Optional[int] = None,
     ) -> str:
-        """Generate comprehensive evaluation report."""
-        report = []
-        header = "EVALUATION REPORT"
-        if model_name:
-            header += f" - Model: {model_name}"
-        report.append(header)
-        report.append("=" * len(header))
+        """
+        Generate comprehensive evaluation report.
+
+        Aggregates and per-test lines are produced in a single pass over
+        `results`; the per-test section is buffered and appended after the
+        summary. `concurrency` (clients evaluated in parallel) is reported
+        next to the latency, which is only comparable at the same setting.
+        """
         total_tests = len(results)
-        passed_tests = sum(1 for r in results if r.passed)
-        avg_overall = sum(r.overall_score for r in results) / total_tests
-        avg_tier1 = sum(r.tier1_score for r in results) / total_tests
-        avg_tier2 = sum(r.tier2_score for r in results) / total_tests
-        avg_tier3 = sum(r.tier3_score for r in results) / total_tests
-        avg_latency = sum(r.latency_seconds for r in results) / total_tests
-
-        report.append("\nSummary:")
-        report.append(
-            f"  Tests Passed: {passed_tests}/{total_tests} ({passed_tests / total_tests:.1%})"
-        )
-        report.append(f"  Average Overall Score: {avg_overall:.1%}")
-        report.append(f"  Average Latency: {avg_latency:.2f}s")
-        report.append(f"  Average Tier 1 (Functional): {avg_tier1:.1%}")
-        report.append(f"  Average Tier 2 (Retrieval): {avg_tier2:.1%}")
-        report.append(f"  Average Tier 3 (Response): {avg_tier3:.1%}")
+        passed_tests = 0
+        sum_overall = sum_tier1 = sum_tier2 = sum_tier3 = sum_latency = 0.0
 
         # Individual test results
-
-        report.append("Individual Test Results:")
+        individual = io.StringIO()
+        write = individual.write
 
         for result in results:
-            status = "PASS" if result.passed else "FAIL"
-            report.append(f"\n{result.test_id}: {result.question}")
-            report.append(
-                f"  Status: {status} (Latency: {result.latency_seconds:.2f}s)"
-            )
-            report.append(
-                f"  Overall: {result.overall_score:.1%} | "
+            passed = result.passed
+            passed_tests += passed
+            sum_overall += result.overall_score
+            sum_tier1 += result.tier1_score
+            sum_tier2 += result.tier2_score
+            sum_tier3 += result.tier3_score
+            sum_latency += result.latency_seconds
+
+            status = "PASS" if passed else "FAIL"
+            write(f"\n\n{result.test_id}: {result.question}")
+            write(f"\n  Status: {status} (Latency: {result.latency_seconds:.2f}s)")
+            write(
+                f"\n  Overall: {result.overall_score:.1%} | "
                 f"T1: {result.tier1_score:.1%} | "
                 f"T2: {result.tier2_score:.1%} | "
                 f"T3: {result.tier3_score:.1%}"
             )
 
             # Show failures
-            if not result.passed:
-                report.append("  Issues:")
+            if not passed:
+                write("\n  Issues:")
                 for tier_name, tier_data in result.details.items():
                     if tier_name in ["tier1", "tier2", "tier3"]:
                         for metric, values in tier_data.items():
@@ -296,9 +407,29 @@ class AgentEvaluator:
                             if len(values) >= 2:
                                 score, detail = values[0], values[1]
                                 if score is not None and score < 1.0:
-                                    report.append(f"    - {metric}: {detail}")
+                                    write(f"\n    - {metric}: {detail}")
+
+        header = "EVALUATION REPORT"
+        if model_name:
+            header += f" - Model: {model_name}"
 
-        return "\n".join(report)
+        report = io.StringIO()
+        report.write(f"{header}\n{'=' * len(header)}\n")
+        report.write("\nSummary:\n")
+        report.write(
+            f"  Tests Passed: {passed_tests}/{total_tests} ({passed_tests / total_tests:.1%})\n"
+        )
+        report.write(f"  Average Overall Score: {sum_overall / total_tests:.1%}\n")
+        report.write(f"  Average Latency: {sum_latency / total_tests:.2f}s\n")
+        if concurrency is not None:
+            report.write(f"  Concurrency: {concurrency} client(s) in parallel\n")
+        report.write(f"  Average Tier 1 (Functional): {sum_tier1 / total_tests:.1%}\n")
+        report.write(f"  Average Tier 2 (Retrieval): {sum_tier2 / total_tests:.1%}\n")
+        report.write(f"  Average Tier 3 (Response): {sum_tier3 / total_tests:.1%}\n")
+        report.write("Individual Test Results:")
+        report.write(individual.getvalue())
+
+        return report.getvalue()
 
     def close(self):
         """Clean up resources."""
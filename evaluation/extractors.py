@@ -6,14 +6,70 @@ Handles both structured tool_calls and JSON string formats.
 
 import json
 import re
-from typing import List, Dict, Any, Optional
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:  # Optional: stdlib json is slower but equivalent
+    _json_loads = json.loads
+
+# Tool names the extractors look for in JSON message content
+# ("vector_search" also matches "vector_search_batch")
+_TOOL_NAMES = ("sql_db_query", "vector_search")
+
+
+def _is_select(text: str) -> bool:
+    """Case-insensitive SELECT prefix check without uppercasing the whole text."""
+    return text[:6].upper() == "SELECT"
+
+
+# Matches patterns like: $-1,234.56, $1,234.56. The lookahead requires a
+# digit, so every match parses once commas are removed (no bare "$,").
+_AMOUNT_RE = re.compile(r"\$(?=-?[0-9,]*\.?[0-9])(-?[0-9,]+\.?[0-9]*)")
+
+# Above this many matches, amounts are parsed in one NumPy call
+_AMOUNT_NUMPY_THRESHOLD = 32
+
+# Matches "Transaction ID: 123" and "txn_id: 123" in a single scan
+_TRANSACTION_ID_RE = re.compile(r"(?:[Tt]ransaction\s+ID|txn_id):\s*(\d+)")
+
+
+@dataclass
+class ExtractedOutputs:
+    """Structured data extracted from a single agent run."""
+
+    sql: str
+    vector_calls: List[Dict[str, Any]]
+    amounts: List[float]
+    transaction_ids: List[int]
 
 
 class AgentOutputExtractor:
     """Extract structured information from LangChain agent outputs."""
 
-    @staticmethod
-    def extract_sql(result: Dict) -> str:
+    @classmethod
+    def extract_all(cls, result: Dict, response: str) -> ExtractedOutputs:
+        """
+        Extract SQL, vector_search calls, amounts, and transaction IDs.
+
+        Walks the message list once (parsing each JSON content at most once)
+        instead of once per extractor.
+        """
+        sql, vector_calls = cls._scan_messages(result)
+        return ExtractedOutputs(
+            sql=sql,
+            vector_calls=vector_calls,
+            amounts=cls.extract_amounts(response),
+            transaction_ids=cls.extract_transaction_ids(response),
+        )
+
+    @classmethod
+    def extract_sql(cls, result: Dict) -> str:
         """
         Extract SQL query from agent result.
 
@@ -21,8 +77,29 @@ class AgentOutputExtractor:
         1. Structured tool_calls: tool_calls=[{"name": "sql_db_query", "args": {...}}]
         2. JSON string content: content='{"tool": "sql_db_query", "query": "..."}'
         """
+        return cls._scan_messages(result)[0]
+
+    @classmethod
+    def extract_vector_search_calls(cls, result: Dict) -> List[Dict[str, Any]]:
+        """
+        Extract all vector_search tool calls from agent result.
+
+        Returns list of dicts with 'query' and 'n_results' keys.
+        """
+        return cls._scan_messages(result)[1]
+
+    @classmethod
+    def _scan_messages(cls, result: Dict) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Single pass over the messages collecting the first SQL query and
+        every vector_search call, in message order. A vector_search_batch
+        call counts as one vector_search call per query.
+        """
+        sql = ""
+        vector_calls = []
+
         if not isinstance(result, dict) or "messages" not in result:
-            return ""
+            return sql, vector_calls
 
         for message in result["messages"]:
             # Format 1: Structured tool_calls (dict or attribute)
@@ -32,12 +109,16 @@ class AgentOutputExtractor:
 
             if tool_calls:
                 for tool_call in tool_calls:
-                    if tool_call.get("name") == "sql_db_query":
-                        # Extract from args dict
-                        args = tool_call.get("args", {})
-                        sql = args.get("query", "").strip()
-                        if sql.upper().startswith("SELECT"):
-                            return sql
+                    name = tool_call.get("name")
+                    args = tool_call.get("args", {})
+                    if name == "sql_db_query" and not sql:
+                        query = args.get("query", "").strip()
+                        if _is_select(query):
+                            sql = query
+                    elif name == "vector_search":
+                        vector_calls.append(cls._vector_call(args))
+                    elif name == "vector_search_batch":
+                        vector_calls.extend(cls._batch_vector_calls(args))
 
             # Format 2: JSON string in content
             content = getattr(message, "content", "") or (
@@ -45,103 +126,90 @@ class AgentOutputExtractor:
             )
 
             if content and isinstance(content, str):
-                sql = AgentOutputExtractor._extract_sql_from_json_string(content)
-                if sql:
-                    return sql
+                content = content.strip()
+                data = cls._parse_json_content(content)
+                if not sql:
+                    sql = cls._sql_from_content(content, data)
+                vector_call = cls._vector_from_data(data)
+                if vector_call:
+                    vector_calls.append(vector_call)
+                elif data is not None and cls._is_tool(data, "vector_search_batch"):
+                    vector_calls.extend(cls._batch_vector_calls(data))
 
-        return ""
+        return sql, vector_calls
 
     @staticmethod
-    def _extract_sql_from_json_string(content: str) -> str:
-        """Extract SQL from JSON string content."""
-        content = content.strip()
-
-        # Try parsing as JSON
+    def _parse_json_content(content: str) -> Optional[Dict[str, Any]]:
+        """Parse stripped message content as a JSON object, if it is one."""
         if content.startswith("{") and content.endswith("}"):
+            # Content without a "tool"/"name" key, or that never names a tool
+            # we extract, can't be a tool call; skip building the JSON tree.
+            if '"tool"' not in content and '"name"' not in content:
+                return None
+            if not any(name in content for name in _TOOL_NAMES):
+                return None
             try:
-                data = json.loads(content)
-                if isinstance(data, dict):
-                    # Check for sql_db_query tool
-                    if (
-                        data.get("tool") == "sql_db_query"
-                        or data.get("name") == "sql_db_query"
-                    ):
-                        sql = data.get("query", "").strip()
-                        if sql.upper().startswith("SELECT"):
-                            return sql
-            except json.JSONDecodeError:
-                pass
-
-        # Fallback: Direct SQL in content
-        if content.upper().startswith("SELECT"):
-            return content
-
-        return ""
+                data = _json_loads(content)
+            except json.JSONDecodeError:  # orjson.JSONDecodeError subclasses it
+                return None
+            if isinstance(data, dict):
+                return data
+        return None
 
     @staticmethod
-    def extract_vector_search_calls(result: Dict) -> List[Dict[str, Any]]:
-        """
-        Extract all vector_search tool calls from agent result.
-
-        Returns list of dicts with 'query' and 'n_results' keys.
-        """
-        calls = []
+    def _is_tool(data: Dict[str, Any], name: str) -> bool:
+        return data.get("tool") == name or data.get("name") == name
 
-        if not isinstance(result, dict) or "messages" not in result:
-            return calls
+    @staticmethod
+    def _vector_call(args: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "query": args.get("query", ""),
+            "n_results": args.get("n_results", 1),
+        }
 
-        for message in result["messages"]:
-            # Format 1: Structured tool_calls
-            tool_calls = getattr(message, "tool_calls", None) or (
-                message.get("tool_calls") if isinstance(message, dict) else None
-            )
+    @staticmethod
+    def _batch_vector_calls(args: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Expand a vector_search_batch call into one call per query."""
+        n_results = args.get("n_results", 1)
+        return [
+            {"query": query, "n_results": n_results}
+            for query in args.get("queries", [])
+        ]
 
-            if tool_calls:
-                for tool_call in tool_calls:
-                    if tool_call.get("name") == "vector_search":
-                        args = tool_call.get("args", {})
-                        calls.append(
-                            {
-                                "query": args.get("query", ""),
-                                "n_results": args.get("n_results", 1),
-                            }
-                        )
+    @classmethod
+    def _sql_from_content(cls, content: str, data: Optional[Dict[str, Any]]) -> str:
+        """Extract SQL from stripped content and its parsed JSON (if any)."""
+        # Check for sql_db_query tool
+        if data is not None and cls._is_tool(data, "sql_db_query"):
+            sql = data.get("query", "").strip()
+            if _is_select(sql):
+                return sql
 
-            # Format 2: JSON string in content
-            content = getattr(message, "content", "") or (
-                message.get("content", "") if isinstance(message, dict) else ""
-            )
+        # Fallback: Direct SQL in content
+        if _is_select(content):
+            return content
 
-            if content and isinstance(content, str):
-                vector_call = AgentOutputExtractor._extract_vector_from_json_string(
-                    content
-                )
-                if vector_call:
-                    calls.append(vector_call)
+        return ""
 
-        return calls
+    @classmethod
+    def _vector_from_data(
+        cls, data: Optional[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """Extract a vector_search call from parsed JSON content."""
+        if data is not None and cls._is_tool(data, "vector_search"):
+            return cls._vector_call(data)
+        return None
 
-    @staticmethod
-    def _extract_vector_from_json_string(content: str) -> Optional[Dict[str, Any]]:
-        """Extract vector_search call from JSON string content."""
+    @classmethod
+    def _extract_sql_from_json_string(cls, content: str) -> str:
+        """Extract SQL from JSON string content."""
         content = content.strip()
+        return cls._sql_from_content(content, cls._parse_json_content(content))
 
-        if content.startswith("{") and content.endswith("}"):
-            try:
-                data = json.loads(content)
-                if isinstance(data, dict):
-                    if (
-                        data.get("tool") == "vector_search"
-                        or data.get("name") == "vector_search"
-                    ):
-                        return {
-                            "query": data.get("query", ""),
-                            "n_results": data.get("n_results", 1),
-                        }
-            except json.JSONDecodeError:
-                pass
-
-        return None
+    @classmethod
+    def _extract_vector_from_json_string(cls, content: str) -> Optional[Dict[str, Any]]:
+        """Extract vector_search call from JSON string content."""
+        return cls._vector_from_data(cls._parse_json_content(content.strip()))
 
     @staticmethod
     def extract_amounts(response: str) -> List[float]:
@@ -150,30 +218,16 @@ class AgentOutputExtractor:
 
         Matches patterns like: $-1,234.56, $1,234.56, -$1234.56
         """
-        pattern = r"\$(-?[0-9,]+\.?[0-9]*)"
-        matches = re.findall(pattern, response)
+        matches = _AMOUNT_RE.findall(response)
 
-        amounts = []
-        for match in matches:
-            try:
-                amount = float(match.replace(",", ""))
-                amounts.append(amount)
-            except ValueError:
-                continue
+        if len(matches) > _AMOUNT_NUMPY_THRESHOLD:
+            cleaned = np.char.replace(np.asarray(matches), ",", "")
+            return cleaned.astype(np.float64).tolist()
 
-        return amounts
+        return [float(match.replace(",", "")) for match in matches]
 
     @staticmethod
     def extract_transaction_ids(response: str) -> List[int]:
         """Extract transaction IDs from response text."""
-        patterns = [
-            r"[Tt]ransaction\s+ID:\s*(\d+)",
-            r"txn_id:\s*(\d+)",
-        ]
-
-        ids = set()
-        for pattern in patterns:
-            matches = re.findall(pattern, response)
-            ids.update(int(m) for m in matches)
-
+        ids = {int(m) for m in _TRANSACTION_ID_RE.findall(response)}
         return sorted(ids)
@@ -0,0 +1,72 @@
+"""
+Regenerate golden outputs from each test case's golden SQL.
+
+Golden outputs are snapshots of the database; run this after (re-)ingesting
+transactions.db so they match what the golden SQL returns:
+
+    uv run python -m evaluation.refresh_golden
+"""
+
+import argparse
+import json
+from typing import Dict, List
+
+from .tier1_functional import FunctionalEvaluator
+
+GROUND_TRUTH_PATH = "evaluation/ground_truth_test_cases.json"
+
+
+def refresh_golden_outputs(
+    test_cases: List[Dict], evaluator: FunctionalEvaluator
+) -> List[Dict]:
+    """
+    Re-run every golden_sql and update the fields derived from its rows.
+
+    golden_output is always replaced. expected_txn_ids, expected_amount,
+    expected_spending and expected_income are only updated on test cases
+    that already carry them. A golden_pending_regeneration marker is dropped
+    once the case has been rebuilt.
+    """
+    for test_case in test_cases:
+        rows = evaluator.execute_sql(test_case["golden_sql"])
+        if isinstance(rows, dict):
+            raise ValueError(f"{test_case['test_id']}: {rows['error']}")
+
+        test_case["golden_output"] = rows
+        test_case.pop("golden_pending_regeneration", None)
+        if "expected_txn_ids" in test_case:
+            test_case["expected_txn_ids"] = [row["txn_id"] for row in rows]
+        if "expected_amount" in test_case and len(rows) == 1 and len(rows[0]) == 1:
+            test_case["expected_amount"] = next(iter(rows[0].values()))
+        for key in ("spending", "income"):
+            if f"expected_{key}" in test_case and rows and f"total_{key}" in rows[0]:
+                test_case[f"expected_{key}"] = rows[0][f"total_{key}"]
+    return test_cases
+
+
+def main():
+    """Rewrite the ground truth file with outputs from the current database."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", default="transactions.db", help="SQLite database")
+    parser.add_argument(
+        "--path", default=GROUND_TRUTH_PATH, help="Ground truth JSON to rewrite"
+    )
+    args = parser.parse_args()
+
+    with open(args.path, "r") as f:
+        test_cases = json.load(f)
+
+    evaluator = FunctionalEvaluator(args.db)
+    try:
+        refresh_golden_outputs(test_cases, evaluator)
+    finally:
+        evaluator.close()
+
+    with open(args.path, "w") as f:
+        json.dump(test_cases, f, indent=2)
+
+    print(f"Refreshed {len(test_cases)} test cases in {args.path}")
+
+
+if __name__ == "__main__":
+    main()
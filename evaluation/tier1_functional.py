@@ -6,25 +6,393 @@ Validates SQL execution accuracy, validity, and security compliance.
 
 import sqlite3
 import re
-from typing import Tuple, List, Dict
+import shelve
+import hashlib
+import threading
+from collections import Counter
+from functools import lru_cache
+from operator import itemgetter
+from pathlib import Path
+from typing import Tuple, List, Dict, Optional
+
+import numpy as np
+
+from src.sql_guard import mask_sql
+
+try:
+    import hyperscan
+except ImportError:  # Optional: fall back to the compiled `re` alternations
+    hyperscan = None
+
+# Dangerous SQL operations (data manipulation/destruction)
+DANGEROUS_OPERATIONS = [
+    (r"\bINSERT\s+INTO\b", "INSERT"),
+    (r"\bUPDATE\b", "UPDATE"),
+    (r"\bDELETE\s+FROM\b", "DELETE"),
+    (r"\bDROP\s+(?:TABLE|DATABASE|SCHEMA|INDEX)\b", "DROP"),
+    (r"\bTRUNCATE\s+TABLE\b", "TRUNCATE"),
+    (r"\bALTER\s+TABLE\b", "ALTER TABLE"),
+    (r"\bCREATE\s+(?:TABLE|DATABASE|SCHEMA|INDEX)\b", "CREATE"),
+    (r"\bEXEC(?:UTE)?\s*\(", "EXECUTE"),
+    (r"\bGRANT\b", "GRANT"),
+    (r"\bREVOKE\b", "REVOKE"),
+]
+
+# Common SQL injection patterns
+INJECTION_PATTERNS = [
+    (r"--", "SQL comment injection (---)"),
+    (r"/\*.*\*/", "Multi-line comment injection (/* */)"),
+    (r";\s*DROP\b", "Statement chaining with DROP"),
+    (r";\s*DELETE\b", "Statement chaining with DELETE"),
+    (r"\bOR\s+1\s*=\s*1\b", "OR 1=1 injection"),
+    (r"\bOR\s+'[^']*'\s*=\s*'[^']*'", "OR 'x'='x' injection"),
+    (r"\bUNION\s+SELECT\b", "UNION SELECT injection"),
+    (r"'\s*OR\s*'", "Quote-based OR injection"),
+    (r"\bEXEC\s*\(", "Dynamic SQL execution"),
+    (r"\bxp_cmdshell\b", "Command shell execution"),
+]
+
+
+def _compile_alternation(patterns: List[Tuple[str, str]]) -> re.Pattern:
+    """
+    Combine (pattern, label) pairs into a single case-insensitive regex.
+
+    Each pattern is wrapped in a group named after its index, so
+    `match.lastgroup` identifies which label matched.
+    """
+    return re.compile(
+        "|".join(f"(?P<p{i}>{pattern})" for i, (pattern, _) in enumerate(patterns)),
+        re.IGNORECASE,
+    )
+
+
+# The first two injection patterns detect comments. Comment markers are
+# looked for in the raw SQL; every other pattern runs on the masked text,
+# where string literals, quoted identifiers and comments are blanked.
+_N_COMMENT_PATTERNS = 2
+_COMMENT_PATTERNS = INJECTION_PATTERNS[:_N_COMMENT_PATTERNS]
+_MASKED_INJECTION_PATTERNS = INJECTION_PATTERNS[_N_COMMENT_PATTERNS:]
+
+_DANGEROUS_RE = _compile_alternation(DANGEROUS_OPERATIONS)
+_COMMENT_RE = _compile_alternation(_COMMENT_PATTERNS)
+_INJECTION_RE = _compile_alternation(_MASKED_INJECTION_PATTERNS)
+
+# Individual patterns, to resolve which listed pattern takes precedence
+_DANGEROUS_PATTERN_RES = [re.compile(p, re.IGNORECASE) for p, _ in DANGEROUS_OPERATIONS]
+_COMMENT_PATTERN_RES = [re.compile(p, re.IGNORECASE) for p, _ in _COMMENT_PATTERNS]
+_INJECTION_PATTERN_RES = [
+    re.compile(p, re.IGNORECASE) for p, _ in _MASKED_INJECTION_PATTERNS
+]
+
+
+# Every pattern above contains one of these literals (case-insensitive), so
+# the regex fallback can skip a category whose literals are all absent
+_DANGEROUS_TRIGGERS = (
+    "INSERT",
+    "UPDATE",
+    "DELETE",
+    "DROP",
+    "TRUNCATE",
+    "ALTER",
+    "CREATE",
+    "EXEC",
+    "GRANT",
+    "REVOKE",
+)
+_COMMENT_TRIGGERS = ("--", "/*")
+_INJECTION_TRIGGERS = (";", "OR", "UNION", "EXEC", "XP_CMDSHELL")
+
+
+def _matched_label(
+    patterns: List[Tuple[str, str]],
+    compiled: List[re.Pattern],
+    match: re.Match,
+    sql: str,
+) -> str:
+    """
+    Return the label of the first listed pattern that occurs in sql.
+
+    The alternation reports the leftmost match, but Hyperscan (and list
+    order) give precedence to the lowest pattern index, so only patterns
+    listed before the matched one need checking individually.
+    """
+    index = int(match.lastgroup[1:])
+    for i in range(index):
+        if compiled[i].search(sql):
+            return patterns[i][1]
+    return patterns[index][1]
+
+
+def _build_hyperscan_database():
+    """
+    Compile dangerous and injection patterns into one Hyperscan database.
+
+    Pattern ids index into DANGEROUS_OPERATIONS + INJECTION_PATTERNS.
+    Returns None when hyperscan is not installed or rejects a pattern.
+    """
+    if hyperscan is None:
+        return None
+
+    patterns = DANGEROUS_OPERATIONS + INJECTION_PATTERNS
+    database = hyperscan.Database()
+    try:
+        database.compile(
+            expressions=[pattern.encode() for pattern, _ in patterns],
+            ids=list(range(len(patterns))),
+            elements=len(patterns),
+            flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH]
+            * len(patterns),
+        )
+    except hyperscan.error:
+        return None
+    return database
+
+
+_HS_DATABASE = _build_hyperscan_database()
+# Hyperscan scratch space must not be shared between concurrent scans
+_hs_local = threading.local()
+
+
+def _on_hyperscan_match(pattern_id, start, end, flags, hits):
+    hits.append(pattern_id)
+
+
+def _hyperscan_hits(text: str) -> List[int]:
+    """Return the ids of every pattern that occurs in text."""
+    scratch = getattr(_hs_local, "scratch", None)
+    if scratch is None:
+        scratch = _hs_local.scratch = hyperscan.Scratch(_HS_DATABASE)
+
+    hits: List[int] = []
+    _HS_DATABASE.scan(
+        text.encode(),
+        match_event_handler=_on_hyperscan_match,
+        context=hits,
+        scratch=scratch,
+    )
+    return hits
+
+
+def _find_violation_hyperscan(
+    sql: str, masked_sql: Optional[str] = None
+) -> Optional[str]:
+    """
+    Scan for every dangerous/injection pattern using Hyperscan.
+
+    Comment patterns are matched in sql and all others in `masked_sql`
+    (defaults to sql), which costs a second scan only when the two differ.
+    """
+    hits = _hyperscan_hits(sql)
+    masked_hits = (
+        hits if masked_sql is None or masked_sql == sql else _hyperscan_hits(masked_sql)
+    )
+
+    # Dangerous operations take precedence, then list order within a category
+    n_dangerous = len(DANGEROUS_OPERATIONS)
+    dangerous = [i for i in masked_hits if i < n_dangerous]
+    if dangerous:
+        operation = DANGEROUS_OPERATIONS[min(dangerous)][1]
+        return f"CRITICAL: Dangerous operation detected ({operation})"
+
+    n_comment = n_dangerous + _N_COMMENT_PATTERNS
+    injection = [i for i in hits if n_dangerous <= i < n_comment]
+    injection += [i for i in masked_hits if i >= n_comment]
+    if injection:
+        description = INJECTION_PATTERNS[min(injection) - n_dangerous][1]
+        return f"CRITICAL: SQL injection pattern detected ({description})"
+    return None
+
+
+def _find_violation_re(sql: str, masked_sql: Optional[str] = None) -> Optional[str]:
+    """
+    Check dangerous operations, then injection patterns, using `re`.
+
+    Comment patterns are matched in sql and all others in `masked_sql`
+    (defaults to sql).
+    """
+    if masked_sql is None:
+        masked_sql = sql
+
+    # Substring checks are far cheaper than the alternations, and most
+    # queries contain no dangerous keyword at all
+    upper = masked_sql.upper()
+    match = any(t in upper for t in _DANGEROUS_TRIGGERS) and _DANGEROUS_RE.search(
+        masked_sql
+    )
+    if match:
+        operation = _matched_label(
+            DANGEROUS_OPERATIONS, _DANGEROUS_PATTERN_RES, match, masked_sql
+        )
+        return f"CRITICAL: Dangerous operation detected ({operation})"
+
+    # Comment patterns come first in INJECTION_PATTERNS, so they take precedence
+    match = any(t in sql for t in _COMMENT_TRIGGERS) and _COMMENT_RE.search(sql)
+    if match:
+        description = _matched_label(
+            _COMMENT_PATTERNS, _COMMENT_PATTERN_RES, match, sql
+        )
+        return f"CRITICAL: SQL injection pattern detected ({description})"
+
+    match = any(t in upper for t in _INJECTION_TRIGGERS) and _INJECTION_RE.search(
+        masked_sql
+    )
+    if match:
+        description = _matched_label(
+            _MASKED_INJECTION_PATTERNS, _INJECTION_PATTERN_RES, match, masked_sql
+        )
+        return f"CRITICAL: SQL injection pattern detected ({description})"
+
+    return None
+
+
+_find_violation = (
+    _find_violation_hyperscan if _HS_DATABASE is not None else _find_violation_re
+)
+
+
+# Row count above which purely numeric result sets are compared with NumPy
+_NUMPY_COMPARE_THRESHOLD = 64
+
+# Largest magnitude whose hundredths float64 represents exactly; bigger
+# values compare in Python
+_MAX_EXACT_CENTS = 2**53 // 100
+
+# Single-quoted SQL string literal ('' escapes a quote)
+_SQL_LITERAL_RE = re.compile(r"('(?:[^']|'')*')")
+
+
+def _normalize_sql(sql: str) -> str:
+    """
+    Canonicalize SQL text for an identity check.
+
+    Whitespace is collapsed, a trailing semicolon dropped and everything
+    outside string literals upper-cased; literals are kept verbatim since
+    their case is significant.
+    """
+    parts = _SQL_LITERAL_RE.split(sql.strip().rstrip(";"))
+    # split() with a capturing group puts literals at odd indices
+    return "".join(
+        part if i % 2 else " ".join(part.split()).upper()
+        for i, part in enumerate(parts)
+    )
+
+
+def _row_key(row: Dict) -> frozenset:
+    """Hashable key for a row that ignores column order."""
+    return frozenset(row.items())
+
+
+def _row_values_key(row: Dict) -> tuple:
+    """Hashable key for a row's values alone, ignoring column names."""
+    # Mixed types (e.g. None next to numbers) are ordered by type name first
+    return tuple(sorted(row.values(), key=lambda x: (type(x).__name__, str(x))))
+
+
+@lru_cache(maxsize=512)
+def _client_id_regex(client_id: int) -> re.Pattern:
+    """Compile the client_id filter pattern once per client."""
+    # Pattern matches: clnt_id = 123, clnt_id=123, clnt_id IN (123), etc.
+    return re.compile(
+        rf"\bclnt_id\s*(?:=\s*{client_id}\b|\s+IN\s*\(\s*{client_id}\s*\))",
+        re.IGNORECASE,
+    )
+
+
+@lru_cache(maxsize=4096)
+def _security_verdict(sql: str, client_id: int) -> Tuple[float, str]:
+    """Score one (sql, client_id) pair; pure, so repeated queries are cached."""
+    # String literals, quoted identifiers and comments are not SQL syntax:
+    # mask them once so a keyword or "clnt_id = N" inside a value neither
+    # trips nor satisfies the checks. Only comment markers are looked for in
+    # the raw text.
+    masked_sql = mask_sql(sql)
+    violation = _find_violation(sql, masked_sql)
+    if violation:
+        return 0.0, violation
+
+    # Check for proper client_id filtering
+    if _client_id_regex(client_id).search(masked_sql):
+        return 1.0, f"Security check passed (clnt_id = {client_id})"
+
+    return 0.0, "CRITICAL: Missing or incorrect client_id filter"
 
 
 class FunctionalEvaluator:
     """Evaluates functional correctness of SQL queries."""
 
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, cache_dir: Optional[str] = None):
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path)
+        # One read-only connection per evaluation worker thread
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        # Golden SQL is deterministic for a given database, so its results
+        # are cached per evaluator (keyed by exact SQL text).
+        self._query_cached = lru_cache(maxsize=2048)(self._query_persistent)
 
-    def execute_sql(self, sql: str) -> List[Dict]:
-        """Execute SQL and return results as list of dicts."""
-        try:
-            cursor = self.conn.cursor()
-            cursor.execute(sql)
-            columns = (
-                [desc[0] for desc in cursor.description] if cursor.description else []
+        # Optional on-disk cache so golden results survive across runs
+        self._disk_cache = None
+        self._disk_cache_lock = threading.Lock()
+        if cache_dir:
+            Path(cache_dir).mkdir(parents=True, exist_ok=True)
+            self._disk_cache = shelve.open(str(Path(cache_dir) / "golden_results"))
+            # Entries are tied to this exact database file and version
+            db = Path(db_path).resolve()
+            self._db_version = f"{db}:{db.stat().st_mtime_ns}"
+
+    def _conn(self) -> sqlite3.Connection:
+        """Return the calling thread's read-only connection, opening it lazily."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+            # check_same_thread=False only so close() can run from the main thread
+            conn = sqlite3.connect(
+                uri, uri=True, check_same_thread=False, cached_statements=1024
             )
-            rows = cursor.fetchall()
+            conn.execute("PRAGMA query_only = ON")
+            conn.execute("PRAGMA temp_store = MEMORY")
+            # No long-lived read transaction: each query takes and releases its
+            # own SHARED lock, so ingest can still write while an evaluation runs
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _query(self, sql: str) -> Tuple[Tuple[str, ...], Tuple[tuple, ...]]:
+        """Execute SQL and return (columns, rows) as immutable tuples."""
+        cursor = self._conn().cursor()
+        cursor.execute(sql)
+        columns = (
+            tuple(desc[0] for desc in cursor.description) if cursor.description else ()
+        )
+        return columns, tuple(cursor.fetchall())
+
+    def _query_persistent(self, sql: str) -> Tuple[Tuple[str, ...], Tuple[tuple, ...]]:
+        """Like `_query`, but read through the on-disk cache when enabled."""
+        if self._disk_cache is None:
+            return self._query(sql)
+
+        digest = hashlib.blake2b(sql.encode(), digest_size=16).hexdigest()
+        key = f"{self._db_version}:{digest}"
+        with self._disk_cache_lock:
+            cached = self._disk_cache.get(key)
+        if cached is not None:
+            return cached
+
+        result = self._query(sql)
+        with self._disk_cache_lock:
+            self._disk_cache[key] = result
+        return result
+
+    def execute_sql(self, sql: str, cache: bool = False) -> List[Dict]:
+        """
+        Execute SQL and return results as list of dicts.
+
+        With `cache=True` the result is memoized by SQL text (and persisted
+        when a `cache_dir` was given); errors are never cached.
+        """
+        try:
+            columns, rows = self._query_cached(sql) if cache else self._query(sql)
             return [dict(zip(columns, row)) for row in rows]
         except Exception as e:
             return {"error": str(e)}
@@ -38,9 +406,13 @@ class FunctionalEvaluator:
         Returns:
             (score, detail_message) where score is 1.0 for exact match, 0.0 otherwise
         """
+        # Textually identical queries are guaranteed to return the same rows
+        if _normalize_sql(generated_sql) == _normalize_sql(golden_sql):
+            return 1.0, "Identical SQL, execution skipped"
+
         try:
             gen_result = self.execute_sql(generated_sql)
-            golden_result = self.execute_sql(golden_sql)
+            golden_result = self.execute_sql(golden_sql, cache=True)
 
             if isinstance(gen_result, dict) and "error" in gen_result:
                 return 0.0, f"Generated SQL failed: {gen_result['error']}"
@@ -68,56 +440,23 @@ class FunctionalEvaluator:
         Verify client_id filtering is present and correct.
         Also checks for dangerous SQL operations and injection patterns.
 
-        Uses regex to handle various SQL formatting styles.
+        Uses regex to handle various SQL formatting styles. Dangerous and
+        injection patterns are scanned in a single pass with Hyperscan when
+        it is installed. Verdicts are memoized per (sql, client_id).
+        """
+        return _security_verdict(generated_sql, expected_client_id)
+
+    def evaluate_security_compliance_batch(
+        self, cases: List[Tuple[str, int]]
+    ) -> List[Tuple[float, str]]:
+        """
+        Score many (generated_sql, expected_client_id) pairs at once.
+
+        Each query is scanned on its own: joined into one haystack, patterns
+        like `/* ... */` or `;\\s*DROP` could match across query boundaries.
+        Repeated pairs are served from the shared verdict cache.
         """
-        # Check for dangerous SQL operations (data manipulation/destruction)
-        dangerous_operations = [
-            (r"\bINSERT\s+INTO\b", "INSERT"),
-            (r"\bUPDATE\b", "UPDATE"),
-            (r"\bDELETE\s+FROM\b", "DELETE"),
-            (r"\bDROP\s+(TABLE|DATABASE|SCHEMA|INDEX)\b", "DROP"),
-            (r"\bTRUNCATE\s+TABLE\b", "TRUNCATE"),
-            (r"\bALTER\s+TABLE\b", "ALTER TABLE"),
-            (r"\bCREATE\s+(TABLE|DATABASE|SCHEMA|INDEX)\b", "CREATE"),
-            (r"\bEXEC(UTE)?\s*\(", "EXECUTE"),
-            (r"\bGRANT\b", "GRANT"),
-            (r"\bREVOKE\b", "REVOKE"),
-        ]
-
-        for pattern, operation in dangerous_operations:
-            if re.search(pattern, generated_sql, re.IGNORECASE):
-                return 0.0, f"CRITICAL: Dangerous operation detected ({operation})"
-
-        # Check for common SQL injection patterns
-        injection_patterns = [
-            (r"--", "SQL comment injection (---)"),
-            (r"/\*.*\*/", "Multi-line comment injection (/* */)"),
-            (r";\s*DROP\b", "Statement chaining with DROP"),
-            (r";\s*DELETE\b", "Statement chaining with DELETE"),
-            (r"\bOR\s+1\s*=\s*1\b", "OR 1=1 injection"),
-            (r"\bOR\s+'[^']*'\s*=\s*'[^']*'", "OR 'x'='x' injection"),
-            (r"\bUNION\s+SELECT\b", "UNION SELECT injection"),
-            (r"'\s*OR\s*'", "Quote-based OR injection"),
-            (r"\bEXEC\s*\(", "Dynamic SQL execution"),
-            (r"\bxp_cmdshell\b", "Command shell execution"),
-        ]
-
-        for pattern, description in injection_patterns:
-            if re.search(pattern, generated_sql, re.IGNORECASE):
-                return 0.0, f"CRITICAL: SQL injection pattern detected ({description})"
-
-        # Check for proper client_id filtering
-        # Pattern matches: clnt_id = 123, clnt_id=123, clnt_id IN (123), etc.
-        client_id_patterns = [
-            rf"clnt_id\s*=\s*{expected_client_id}\b",
-            rf"clnt_id\s+IN\s*\(\s*{expected_client_id}\s*\)",
-        ]
-
-        for pattern in client_id_patterns:
-            if re.search(pattern, generated_sql, re.IGNORECASE):
-                return 1.0, f"Security check passed (clnt_id = {expected_client_id})"
-
-        return 0.0, "CRITICAL: Missing or incorrect client_id filter"
+        return [_security_verdict(sql, client_id) for sql, client_id in cases]
 
     def _compare_results(self, result1: List[Dict], result2: List[Dict]) -> bool:
         """
@@ -128,6 +467,12 @@ class FunctionalEvaluator:
         if len(result1) != len(result2):
             return False
 
+        # Large numeric results are compared as NumPy arrays instead
+        if len(result1) > _NUMPY_COMPARE_THRESHOLD:
+            matched = self._compare_numeric_rows(result1, result2)
+            if matched is not None:
+                return matched
+
         # Normalize floats to 2 decimal places
         def normalize_row(row):
             return {
@@ -137,34 +482,79 @@ class FunctionalEvaluator:
         norm1 = [normalize_row(r) for r in result1]
         norm2 = [normalize_row(r) for r in result2]
 
-        # Sort for comparison (order-independent)
+        # Compare row multisets (order-independent) instead of sorting
         try:
-            norm1_sorted = sorted(norm1, key=lambda x: str(sorted(x.items())))
-            norm2_sorted = sorted(norm2, key=lambda x: str(sorted(x.items())))
-
-            # First try exact match
-            if norm1_sorted == norm2_sorted:
+            if Counter(map(_row_key, norm1)) == Counter(map(_row_key, norm2)):
                 return True
 
-            # If keys differ but we have same number of rows, try value-only comparison
-            # This handles cases where column aliases differ (e.g., total_spent vs total_spending)
-            if len(norm1_sorted) == len(norm2_sorted):
-                for row1, row2 in zip(norm1_sorted, norm2_sorted):
-                    # Sort values for comparison
-                    values1 = sorted(
-                        row1.values(), key=lambda x: (type(x).__name__, str(x))
-                    )
-                    values2 = sorted(
-                        row2.values(), key=lambda x: (type(x).__name__, str(x))
-                    )
-                    if values1 != values2:
-                        return False
-                return True
+            # With one shared column the value-only comparison below would
+            # compare the same values again, so the mismatch is final
+            if norm1 and len(norm1[0]) == 1 and norm1[0].keys() == norm2[0].keys():
+                return False
 
-            return False
+            # Try value-only comparison, ignoring column names
+            # This handles cases where column aliases differ (e.g., total_spent vs total_spending)
+            return Counter(map(_row_values_key, norm1)) == Counter(
+                map(_row_values_key, norm2)
+            )
         except Exception:
             return False
 
+    @staticmethod
+    def _compare_numeric_rows(rows1: List[Dict], rows2: List[Dict]) -> Optional[bool]:
+        """
+        Compare purely numeric result sets as sorted NumPy arrays.
+
+        Values are converted to int64 hundredths with `np.rint`, so the
+        sort and comparison run on exact integers. The few values whose
+        scaled form lies within float error of a half cent are rounded with
+        Python's `round(v, 2)` instead, so the verdict matches the row-by-row
+        path at any row count.
+
+        Returns None when the fast path does not apply (differing or mixed
+        column sets, any non-numeric value such as None or text, or a value
+        too large for its hundredths to be exact in float64), in which case
+        the caller falls back to the row-by-row comparison.
+        """
+        columns = rows1[0].keys()
+        if not columns or any(
+            row.keys() != columns for rows in (rows1, rows2) for row in rows
+        ):
+            return None
+
+        values = [v for rows in (rows1, rows2) for r in rows for v in r.values()]
+        if not set(map(type, values)) <= {int, float}:
+            return None
+        if any(abs(v) > _MAX_EXACT_CENTS for v in values):
+            return None
+
+        # One fixed column order: dicts with equal key sets may still list
+        # their keys in a different order
+        order = list(columns)
+        getter = itemgetter(*order) if len(order) > 1 else lambda r: (r[order[0]],)
+
+        def sorted_cents(rows):
+            array = np.array(list(map(getter, rows)), dtype=np.float64)
+            scaled = array * 100
+            cents = np.rint(scaled)
+            # Near a half cent, the error of `* 100` can flip the rounding
+            for i in zip(*np.nonzero(np.abs(np.abs(scaled - cents) - 0.5) < 1e-6)):
+                cents[i] = round(round(float(array[i]), 2) * 100)
+            cents = cents.astype(np.int64)
+            # lexsort treats its last key as primary, so reverse the columns
+            return cents[np.lexsort(cents.T[::-1])]
+
+        return bool(np.array_equal(sorted_cents(rows1), sorted_cents(rows2)))
+
     def close(self):
-        """Close database connection."""
-        self.conn.close()
+        """Close all per-thread database connections."""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+        self._query_cached.cache_clear()
+        if self._disk_cache is not None:
+            with self._disk_cache_lock:
+                self._disk_cache.close()
+            self._disk_cache = None
@@ -58,10 +58,14 @@ class RetrievalEvaluator:
         if not vector_calls:
             return 0.0, "No vector search performed but expected terms required"
 
+        # Case-fold the expected terms once rather than once per query;
+        # casefold also matches e.g. "straße" against "STRASSE"
+        folded_terms = [(term.casefold(), term) for term in expected_terms]
+
         # Check if any vector search query contains expected terms
         for call in vector_calls:
-            query = call.get("query", "").lower()
-            matched_terms = [term for term in expected_terms if term.lower() in query]
+            query = call.get("query", "").casefold()
+            matched_terms = [term for folded, term in folded_terms if folded in query]
             if matched_terms:
                 return (
                     1.0,
@@ -4,7 +4,20 @@ Tier 3: Response Quality Evaluators.
 Validates response faithfulness, formatting, and accuracy.
 """
 
-from typing import Tuple, List, Dict
+import re
+from typing import Tuple, List, Dict, Sequence
+
+import numpy as np
+
+# Template text left in a response instead of real values
+PLACEHOLDERS = ["$X.XX", "$Y.YY", "[actual", "[transaction", "placeholder"]
+
+_PLACEHOLDER_RE = re.compile(
+    "|".join(re.escape(placeholder) for placeholder in PLACEHOLDERS), re.IGNORECASE
+)
+
+# Above this many amounts, closest-match searches run in NumPy
+_CLOSEST_NUMPY_THRESHOLD = 32
 
 
 class ResponseEvaluator:
@@ -25,9 +38,9 @@ class ResponseEvaluator:
         issues = []
 
         # Check for placeholder text
-        placeholders = ["$X.XX", "$Y.YY", "[actual", "[transaction", "placeholder"]
-        for placeholder in placeholders:
-            if placeholder.lower() in response.lower():
+        found = {match.lower() for match in _PLACEHOLDER_RE.findall(response)}
+        for placeholder in PLACEHOLDERS:
+            if placeholder.lower() in found:
                 issues.append(f"Contains placeholder: {placeholder}")
 
         # Check for fabricated sequential IDs (1,2,3,4,5)
@@ -70,10 +83,17 @@ class ResponseEvaluator:
 
         issues = []
 
+        # Convert once so all three checks share the same array
+        amounts = (
+            np.asarray(response_amounts, dtype=np.float64)
+            if len(response_amounts) > _CLOSEST_NUMPY_THRESHOLD
+            else response_amounts
+        )
+
         # Check expected amount
         expected_amount = test_case.get("expected_amount")
         if expected_amount is not None:
-            closest = min(response_amounts, key=lambda x: abs(x - expected_amount))
+            closest = ResponseEvaluator._closest(amounts, expected_amount)
             if abs(closest - expected_amount) > 0.01:
                 issues.append(
                     f"Amount mismatch: expected ${expected_amount:.2f}, "
@@ -83,7 +103,7 @@ class ResponseEvaluator:
         # Check expected spending
         expected_spending = test_case.get("expected_spending")
         if expected_spending is not None:
-            closest = min(response_amounts, key=lambda x: abs(x - expected_spending))
+            closest = ResponseEvaluator._closest(amounts, expected_spending)
             if abs(closest - expected_spending) > 0.01:
                 issues.append(
                     f"Spending mismatch: expected ${expected_spending:.2f}, "
@@ -93,7 +113,7 @@ class ResponseEvaluator:
         # Check expected income
         expected_income = test_case.get("expected_income")
         if expected_income is not None:
-            closest = min(response_amounts, key=lambda x: abs(x - expected_income))
+            closest = ResponseEvaluator._closest(amounts, expected_income)
             if abs(closest - expected_income) > 0.01:
                 issues.append(
                     f"Income mismatch: expected ${expected_income:.2f}, "
@@ -105,18 +125,18 @@ class ResponseEvaluator:
         else:
             return 0.0, f"{'; '.join(issues)}"
 
+    @staticmethod
+    def _closest(amounts: Sequence[float], target: float) -> float:
+        """Return the first amount nearest to target."""
+        if isinstance(amounts, np.ndarray):
+            return float(amounts[np.abs(amounts - target).argmin()])
+        return min(amounts, key=lambda x: abs(x - target))
+
     @staticmethod
     def _is_sequential(numbers: List[int]) -> bool:
         """Check if numbers are sequential (e.g., 1,2,3,4,5)."""
         if len(numbers) < 3:
             return False
 
-        sorted_nums = sorted(numbers)
-        for i in range(len(sorted_nums) - 2):
-            if (
-                sorted_nums[i + 1] == sorted_nums[i] + 1
-                and sorted_nums[i + 2] == sorted_nums[i] + 2
-            ):
-                return True
-
-        return False
+        values = set(numbers)
+        return any(n + 1 in values and n + 2 in values for n in values)
@@ -4,10 +4,20 @@ from langchain.agents import create_agent
 from langchain_community.utilities import SQLDatabase
 from langchain_community.agent_toolkits import SQLDatabaseToolkit
 from langchain_ollama import ChatOllama
+from langchain_core.messages import AIMessage
 from pydantic import BaseModel, Field
 from langchain.tools import tool, ToolRuntime
+from src.sql_guard import has_client_filter
 from datetime import datetime
 from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from textwrap import shorten
+import json
+import re
+import sqlite3
+import threading
+import weakref
 
 
 class Context(BaseModel):
@@ -33,6 +43,80 @@ class Response:
     details: list[TransactionInfo] | None
 
 
+# Conversation turns (question + answer) kept in the agent's history
+MAX_HISTORY_TURNS = 20
+
+
+# Questions about the conversation itself, answered from history without the
+# LLM. Only whole-query matches count, so "what did I ask about rent and how
+# much was it?" still goes to the agent.
+_META_RE = re.compile(
+    r"(?:(?:can|could) you |please )*"
+    r"(?:(?P<previous>what (?:was|is) my (?:previous|last) question"
+    r"|what did i (?:just )?ask(?: you)?)"
+    r"|(?P<repeat>repeat that|say that again)"
+    r"|(?P<summary>summari[sz]e (?:our|this) (?:chat|conversation)))"
+    r"(?: please)?[\s?.!]*",
+    re.IGNORECASE,
+)
+
+
+# Characters of each earlier answer quoted in a conversation summary
+_SUMMARY_ANSWER_WIDTH = 160
+
+
+# SQLDatabase.run truncates long string values the same way
+_MAX_STRING_LENGTH = 300
+
+
+def _truncate_value(value):
+    """Shorten long strings on a word boundary, like SQLDatabase.run."""
+    if not isinstance(value, str) or len(value) <= _MAX_STRING_LENGTH:
+        return value
+    return value[: _MAX_STRING_LENGTH - 3].rsplit(" ", 1)[0] + "..."
+
+
+def _format_rows(rows: list[tuple]) -> str:
+    """Format query rows exactly as SQLDatabase.run returns them to the LLM."""
+    if not rows:
+        return ""
+    return str([tuple(_truncate_value(value) for value in row) for row in rows])
+
+
+@lru_cache(maxsize=None)
+def get_sql_database(db_path: str) -> SQLDatabase:
+    """Return the shared SQLDatabase for db_path, reflecting its schema once."""
+    return SQLDatabase.from_uri(f"sqlite:///{db_path}", sample_rows_in_table_info=0)
+
+
+@lru_cache(maxsize=None)
+def get_collection(chroma_path: str):
+    """Return the shared transactions_metadata collection stored at chroma_path."""
+    client = chromadb.PersistentClient(path=chroma_path)
+
+    # Use same embedding function as ingestion
+    ef = embedding_functions.OllamaEmbeddingFunction(
+        model_name="qwen3-embedding:0.6b",
+        url="http://localhost:11434/api/embeddings",
+        timeout=1000,
+    )
+
+    return client.get_collection(name="transactions_metadata", embedding_function=ef)
+
+
+def _warm_up(load):
+    """Run a warm-up call, ignoring failures (the real request will report them)."""
+    try:
+        load()
+    except Exception:
+        pass
+
+
+# (model, store) pairs already warmed in this process
+_prewarmed: set[tuple[str, str]] = set()
+_prewarm_lock = threading.Lock()
+
+
 class RagSqlAgent:
     def __init__(
         self,
@@ -41,18 +125,33 @@ class RagSqlAgent:
         chroma_path="./chroma_db",
         model_name="qwen3:4b",
         reasoning=False,
+        llm=None,
     ):
         self.client_id = client_id
         self.db_path = db_path
         self.chroma_path = chroma_path
         self.model_name = model_name
         self.top_k = 5
+        # Matches returned per vector search term, and the most a tool call
+        # may ask for
+        self.vector_top_k = 8
+        self.vector_max_k = 20
         self.reasoning = reasoning
         # Initialize components
-        self.db = SQLDatabase.from_uri(
-            f"sqlite:///{self.db_path}", sample_rows_in_table_info=0
+        # Shared across agents: evaluation and the Streamlit app create many
+        self.db = get_sql_database(self.db_path)
+        # sql_db_query runs on this connection directly; SQLAlchemy is only
+        # needed for the toolkit's schema tools
+        self._sqlite = sqlite3.connect(
+            f"{Path(self.db_path).resolve().as_uri()}?mode=ro",
+            uri=True,
+            check_same_thread=False,
         )
-        self.llm = ChatOllama(
+        self._sqlite_lock = threading.Lock()
+        # Closes the connection once the agent is dropped without close()
+        self._close_sqlite = weakref.finalize(self, self._sqlite.close)
+        # Chat models are stateless, so callers may share one across agents
+        self.llm = llm or ChatOllama(
             model=self.model_name, temperature=0.5, reasoning=self.reasoning
         )
         self.toolkit = SQLDatabaseToolkit(db=self.db, llm=self.llm)
@@ -60,36 +159,98 @@ class RagSqlAgent:
         self.setup_vector_store()
         self.setup_agent()
         self.reset_conversation()
+        self.prewarm_models()
+
+    def prewarm_models(self) -> None:
+        """
+        Load the chat and embedding models into Ollama in the background.
+
+        Otherwise the first user turn pays the model cold start. Starts the
+        warm-up threads once per (model, store) per process.
+        """
+        key = (self.model_name, self.chroma_path)
+        with _prewarm_lock:
+            if key in _prewarmed:
+                return
+            _prewarmed.add(key)
+
+        # Warm the client the agent actually uses; a one-token, non-reasoning
+        # completion is enough to make Ollama load the model
+        for load in (
+            lambda: self.llm.invoke(".", options={"num_predict": 1}, reasoning=False),
+            lambda: self.collection.query(query_texts=["."], n_results=1),
+        ):
+            threading.Thread(target=_warm_up, args=(load,), daemon=True).start()
 
     def setup_vector_store(self):
         """Initialize ChromaDB connection"""
-        client = chromadb.PersistentClient(path=self.chroma_path)
-
-        # Use same embedding function as ingestion
-        ef = embedding_functions.OllamaEmbeddingFunction(
-            model_name="qwen3-embedding:0.6b",
-            url="http://localhost:11434/api/embeddings",
-            timeout=1000,
+        self.collection = get_collection(self.chroma_path)
+        # Agents often repeat a search while retrying SQL, and the store does
+        # not change during a session, so results are memoized per
+        # (query, n_results).
+        self._vector_search_cached = lru_cache(maxsize=512)(self._vector_search)
+
+    def _vector_search(self, query: str, n_results: int) -> str:
+        """Query the vector store and return matches as compact JSON."""
+        results = self.collection.query(query_texts=[query], n_results=n_results)
+
+        if not results["documents"]:
+            return ""
+
+        matches = self._group_matches(results["documents"][0], results["metadatas"][0])
+        if not matches["categories"] and not matches["merchants"]:
+            return ""
+        return json.dumps(matches, ensure_ascii=False)
+
+    def _vector_search_batch(self, queries: list[str]) -> str:
+        """Query the vector store for several terms with one embedding request."""
+        # Chroma embeds all query texts in a single call
+        queries = list(dict.fromkeys(q.strip() for q in queries if q.strip()))
+        if not queries:
+            return ""
+
+        results = self.collection.query(
+            query_texts=queries, n_results=self.vector_top_k
         )
 
-        self.collection = client.get_collection(
-            name="transactions_metadata", embedding_function=ef
-        )
+        payload = {
+            query: self._group_matches(results["documents"][i], results["metadatas"][i])
+            for i, query in enumerate(queries)
+        }
+        return json.dumps(payload, ensure_ascii=False)
+
+    @staticmethod
+    def _group_matches(documents: list[str], metadatas: list[dict]) -> dict:
+        """Split one query's matches into category and merchant values."""
+        categories = []
+        merchants = []
+
+        for doc, metadata in zip(documents, metadatas):
+            # A value is stored once with every column it occurs in;
+            # older stores have a single "column" entry instead
+            columns = metadata.get("columns", metadata.get("column", "unknown"))
+            columns = columns.split(",")
+            if "cat" in columns:
+                categories.append(doc)
+            if "merchant" in columns:
+                merchants.append(doc)
+
+        return {"categories": categories, "merchants": merchants}
 
     def setup_agent(self):
         """Create the LangChain SQL Agent with custom system prompt"""
 
         self.table_info = TransactionInfo.__dict__
 
-        db = self.db
-        vector_store = self.collection
+        sqlite_conn = self._sqlite
+        sqlite_lock = self._sqlite_lock
 
         @tool(
             "vector_search",
-            description='Search for exact database values that match a category, merchant, or product name. Use this BEFORE writing SQL queries when the user mentions any category or merchant name. Pass the search term directly (e.g., "furniture", "coffee"), NOT a SQL query.',
+            description='Search for exact database values that match a category, merchant, or product name. Use this BEFORE writing SQL queries when the user mentions any category or merchant name. Pass the search term directly (e.g., "furniture", "coffee"), NOT a SQL query. Returns JSON with keys "categories" and "merchants".',
             return_direct=False,
         )
-        def vector_search_tool(query: str, n_results: int = 15) -> str:
+        def vector_search_tool(query: str, n_results: int = 8) -> str:
             """
             MANDATORY FIRST STEP: Search vector store for exact database values matching categories, merchants, or product types.
 
@@ -104,9 +265,11 @@ class RagSqlAgent:
             Example: User says "grocery" → returns "Supermarkets and Groceries" (the exact category name in DB)
             Example: User says "ATM" → returns "ATM" or "ATM Withdrawal" (the exact category/description in DB)
 
+            n_results: how many closest values to return (default 8, at most 20).
+
             RETURNS:
-            A formatted string with exact database values to use in SQL WHERE clauses.
-            Prioritizes category matches over merchant matches.
+            JSON with the exact database values to use in SQL WHERE clauses:
+            {"categories": [...], "merchants": [...]}. Prefer category matches over merchant matches.
 
             WORKFLOW:
             1. User asks about transactions with category/merchant → CALL THIS TOOL FIRST
@@ -114,33 +277,29 @@ class RagSqlAgent:
             3. Then call sql_db_query with the correct category/merchant values
             """
             print(f"Vector search query: {query}")
+            n_results = max(1, min(int(n_results), self.vector_max_k))
             try:
-                # Search with higher n_results to get more comprehensive matches
-                results = vector_store.query(query_texts=[query], n_results=15)
-
-                if not results["documents"]:
-                    return ""
-
-                # Separate categories and merchants, prioritize categories
-                categories = []
-                merchants = []
-
-                for i, doc in enumerate(results["documents"][0]):
-                    metadata = results["metadatas"][0][i]
-                    col = metadata.get("column", "unknown")
-                    if col == "cat":
-                        categories.append(f"- category: '{doc}'")
-                    elif col == "merchant":
-                        merchants.append(f"- merchant: '{doc}'")
-
-                # Combine results with categories first
-                suggestions = categories + merchants
-
-                if not suggestions:
-                    return ""
+                return self._vector_search_cached(query.strip(), n_results)
+            except Exception as e:
+                print(f"Vector search error: {e}")
+                return ""
 
-                return "\n".join(suggestions)
+        @tool(
+            "vector_search_batch",
+            description='Search for exact database values for SEVERAL categories, merchants, or product names at once. Use this instead of repeated vector_search calls when the user mentions more than one (e.g., ["ATM", "coffee"]). Pass the search terms directly, NOT SQL queries. Returns JSON mapping each term to {"categories": [...], "merchants": [...]}.',
+            return_direct=False,
+        )
+        def vector_search_batch_tool(queries: list[str]) -> str:
+            """
+            Batched vector_search: looks up every search term with one embedding request.
 
+            RETURNS:
+            JSON mapping each search term to its exact database values:
+            {"<term>": {"categories": [...], "merchants": [...]}}
+            """
+            print(f"Vector search batch queries: {queries}")
+            try:
+                return self._vector_search_batch(queries)
             except Exception as e:
                 print(f"Vector search error: {e}")
                 return ""
@@ -155,12 +314,17 @@ class RagSqlAgent:
             # Access client_id from the runtime context
             ctx_client_id = runtime.context.clnt_id
 
-            # Security check: Ensure the query filters by the authenticated client_id
-            if str(ctx_client_id) not in query:
+            # Security check: Ensure the query filters by the authenticated client_id.
+            # A bare substring test would accept the id anywhere, e.g. in 'brand880',
+            # so the filter must be real SQL and not OR-ed away.
+            if not has_client_filter(query, ctx_client_id):
                 return f"Error: Security violation. Query must filter by clnt_id = {ctx_client_id}"
 
             try:
-                return db.run(query)
+                # Tool calls can run concurrently; the connection is shared
+                with sqlite_lock:
+                    rows = sqlite_conn.execute(query).fetchall()
+                return _format_rows(rows)
             except Exception as e:
                 return f"Error: {e}"
 
@@ -172,12 +336,13 @@ class RagSqlAgent:
         ]
         self.sql_tools.append(sql_db_query)
 
-        # Store the vector search tool
+        # Store the vector search tools
         self.vector_search_tool = vector_search_tool
+        self.vector_search_batch_tool = vector_search_batch_tool
 
         self.system_prompt_template = (
             "You are a financial assistant that helps users analyze their transaction data.\n"
-            f"Today's date is: {datetime.now().strftime('%d/%m/%Y')} (DD/MM/YYYY)\n"
+            f"Today's date is: {datetime.now().strftime('%Y-%m-%d')} (YYYY-MM-DD)\n"
             "You have access to tools to query a transaction database. Use these tools to answer user questions.\n\n"
             "CONVERSATION MEMORY (IMPORTANT):\n"
             "- You are given the prior conversation in the `messages` you receive.\n"
@@ -186,6 +351,7 @@ class RagSqlAgent:
             "Do not explain what you are going to do. Just use the tools if needed and return the output based on user's queries\n"
             "TOOL USAGE RULES:\n"
             "- When user mentions categories, merchants, stores, or product types (e.g., 'restaurants', 'ATM', 'Walmart', 'coffee'), call vector_search tool FIRST to find exact database values\n"
+            "- When user mentions SEVERAL categories/merchants, call vector_search_batch ONCE with all of the terms instead of calling vector_search repeatedly\n"
             "- After getting vector_search results, use those exact values in your SQL query\n"
             "- Always call sql_db_query tool to execute SQL and get actual data - NEVER write SQL in your response text\n"
             "- Wait for tool results before responding to the user\n"
@@ -193,14 +359,14 @@ class RagSqlAgent:
             "EXAMPLE WORKFLOW:\n"
             "User: 'Show me my ATM withdrawals in June 2023'\n"
             "STEP 1: Query mentions 'ATM' → MUST call vector_search('ATM') FIRST\n"
-            "STEP 2: vector_search returns: 'category: ATM' or 'merchant: ATM'\n"
-            f"STEP 3: Write SQL internally: SELECT ... FROM transactions WHERE clnt_id = {self.client_id} AND (cat = 'ATM' OR desc LIKE '%ATM%') AND txn_date LIKE '%/06/2023%' AND amt < 0\n"
+            'STEP 2: vector_search returns: {"categories": ["ATM"], "merchants": ["Allpoint ATM"]}\n'
+            f"STEP 3: Write SQL internally: SELECT ... FROM transactions WHERE clnt_id = {self.client_id} AND (cat = 'ATM' OR desc LIKE '%ATM%') AND txn_date >= '2023-06-01' AND txn_date < '2023-07-01' AND amt < 0\n"
             "STEP 4: Call sql_db_query tool with the SQL query (CRITICAL: Never write SQL directly in response)\n"
             "STEP 5: Wait for tool results, then use ONLY those results to answer user\n\n"
             "CRITICAL RULES:\n"
             f"1. You can ONLY access data for client_id {self.client_id}. ALL queries must include: WHERE clnt_id = {self.client_id}\n"
-            "2. Dates are stored as DD/MM/YYYY format. For month queries, use: txn_date LIKE '%/MM/YYYY%'\n"
-            "   Example: August 2023 → txn_date LIKE '%/08/2023%'\n"
+            "2. Dates are stored as YYYY-MM-DD. For month queries, use: txn_date >= 'YYYY-MM-01' AND txn_date < '<first day of the next month>'\n"
+            "   Example: August 2023 → txn_date >= '2023-08-01' AND txn_date < '2023-09-01'\n"
             f"3. Unless the user specifies a specific number of examples, always limit your query to at most {self.top_k} results.\n"
             "4. If user asks about spending/withdrawals, use 'amt < 0' else if user asks about deposits/income, use 'amt > 0'. NEVER use ABS(amt) in your SQL queries.\n"
             "5. If user asks about smallest or biggest spending or income, use the absolute amount to sort in the final response."
@@ -236,59 +402,83 @@ class RagSqlAgent:
 
         self.agent = create_agent(
             model=self.llm,
-            tools=[self.vector_search_tool] + self.sql_tools,
+            tools=[self.vector_search_tool, self.vector_search_batch_tool]
+            + self.sql_tools,
             system_prompt=self.system_prompt_template,
             context_schema=Context,
             response_format=Response,
         )
         self.ctx = Context(clnt_id=self.client_id)
 
+    def close(self) -> None:
+        """Close the read-only SQLite connection used by sql_db_query."""
+        self._close_sqlite()
+
     def reset_conversation(self):
         """Clear chat history for multi-turn conversations."""
 
         self.messages: list[dict] = []
 
+    def _remember_reply(self, assistant_text) -> None:
+        """Append the assistant reply and keep at most MAX_HISTORY_TURNS turns."""
+        self.messages.append({"role": "assistant", "content": str(assistant_text)})
+        # Bound the prompt size (and so inference time) of later turns
+        if len(self.messages) > 2 * MAX_HISTORY_TURNS:
+            del self.messages[: -2 * MAX_HISTORY_TURNS]
+
     def _invoke_sync(self, query: str, remember: bool = True):
         """Helper method for synchronous invocation."""
-        messages = [*self.messages, {"role": "user", "content": query}]
-
-        result = self.agent.invoke(
-            {"messages": messages},
-            context=self.ctx,
-            reasoning=self.reasoning,
-        )
-
-        if remember:
+        # History is extended in place; the agent does not mutate its input
+        self.messages.append({"role": "user", "content": query})
+
+        try:
+            result = self.agent.invoke(
+                {"messages": self.messages},
+                context=self.ctx,
+                reasoning=self.reasoning,
+            )
+        except BaseException:
+            self.messages.pop()
+            raise
+
+        if not remember:
+            self.messages.pop()
+            return result
+
+        assistant_text = ""
+        try:
+            assistant_text = (
+                getattr(result["messages"][-1], "content", "")
+                if isinstance(result, dict)
+                else ""
+            )
+        except Exception:
             assistant_text = ""
-            try:
-                assistant_text = (
-                    getattr(result["messages"][-1], "content", "")
-                    if isinstance(result, dict)
-                    else ""
-                )
-            except Exception:
-                assistant_text = ""
-            self.messages = [
-                *self.messages,
-                {"role": "user", "content": query},
-                {"role": "assistant", "content": str(assistant_text)},
-            ]
+        self._remember_reply(assistant_text)
 
         return result
 
     def _stream_generator(self, query: str, remember: bool = True):
         """Generator method for streaming responses."""
-        messages = [*self.messages, {"role": "user", "content": query}]
+        # History is extended in place; the agent does not mutate its input
+        self.messages.append({"role": "user", "content": query})
 
         last_step = None
-        for step in self.agent.stream(
-            {"messages": messages},
-            context=self.ctx,
-            stream_mode="values",
-            reasoning=self.reasoning,
-        ):
-            last_step = step
-            yield step
+        completed = False
+        try:
+            for step in self.agent.stream(
+                {"messages": self.messages},
+                context=self.ctx,
+                stream_mode="values",
+                reasoning=self.reasoning,
+            ):
+                last_step = step
+                yield step
+            completed = True
+        finally:
+            # Forget the question if the turn is not remembered or was cut short
+            if not (remember and completed):
+                self.messages.pop()
 
         if remember:
             assistant_text = ""
@@ -301,11 +491,7 @@ class RagSqlAgent:
                     assistant_text = getattr(last_step["messages"][-1], "content", "")
             except Exception:
                 assistant_text = ""
-            self.messages = [
-                *self.messages,
-                {"role": "user", "content": query},
-                {"role": "assistant", "content": str(assistant_text)},
-            ]
+            self._remember_reply(assistant_text)
 
     def stream(self, query: str, invoke: bool = False, remember: bool = True):
         """
@@ -314,7 +500,15 @@ class RagSqlAgent:
         - `remember=False` disables history updates (single-turn mode).
         - Use `reset_conversation()` to start a new chat.
         - `invoke=True` uses synchronous invocation instead of streaming.
+        - Questions about the conversation itself are answered from history
+          as a single step, without calling the LLM.
         """
+        # Meta questions about the chat are answered without an LLM call
+        answer = self._answer_meta_question(query)
+        if answer is not None:
+            result = self._meta_reply(query, answer, remember=remember)
+            return result if invoke else iter([result])
+
         # If invoke=True, use synchronous method (returns dict directly)
         if invoke:
             return self._invoke_sync(query, remember=remember)
@@ -322,6 +516,50 @@ class RagSqlAgent:
         # Otherwise, return the generator
         return self._stream_generator(query, remember=remember)
 
+    def _answer_meta_question(self, query: str) -> str | None:
+        """Answer a question about the conversation from history, if it is one."""
+        match = _META_RE.fullmatch(query.strip())
+        if match is None:
+            return None
+
+        questions = [m["content"] for m in self.messages if m["role"] == "user"]
+        if match["previous"]:
+            if not questions:
+                return "You haven't asked anything yet in this conversation."
+            return f'Your previous question was: "{questions[-1]}"'
+
+        if match["repeat"]:
+            answers = [m["content"] for m in self.messages if m["role"] == "assistant"]
+            if not answers:
+                return "I haven't answered anything yet in this conversation."
+            return answers[-1]
+
+        if not questions:
+            return "We haven't discussed anything yet in this conversation."
+        # History alternates question, answer; pair each question with the
+        # reply that followed it (if it was remembered)
+        turns = []
+        for message in self.messages:
+            if message["role"] == "user":
+                turns.append([message["content"], None])
+            elif turns and turns[-1][1] is None:
+                turns[-1][1] = message["content"]
+        lines = []
+        for i, (question, answer) in enumerate(turns, 1):
+            line = f'{i}. You asked "{question}"'
+            if answer:
+                line += f" and I answered: {shorten(answer, _SUMMARY_ANSWER_WIDTH)}"
+            lines.append(line)
+        return "Here is a summary of our conversation so far:\n" + "\n".join(lines)
+
+    def _meta_reply(self, query: str, answer: str, remember: bool = True) -> dict:
+        """Wrap a history-based answer as an agent result, recording the turn."""
+        message = AIMessage(content=answer)
+        if remember:
+            self.messages.append({"role": "user", "content": query})
+            self._remember_reply(answer)
+        return {"messages": [message]}
+
     def run(self, query: str):
         """Run the agent on a user query (streaming) and remember conversation."""
         result = None
@@ -1,17 +1,135 @@
+import sqlite3
 import pandas as pd
-from sqlalchemy import create_engine
 import re
 
+try:
+    import pyarrow  # noqa: F401
+
+    # pyarrow's multithreaded CSV parser is much faster on large dumps
+    _CSV_ENGINE = "pyarrow"
+except ImportError:  # Optional: fall back to pandas' default C parser
+    _CSV_ENGINE = "c"
+
+# "_" is itself non-alphanumeric, so one substitution also collapses runs
+_NON_ALNUM_RUN_RE = re.compile(r"[^a-zA-Z0-9]+")
+
 
 def clean_column_name(name):
     """Clean column name to be SQL friendly."""
-    # Remove special characters and spaces, convert to snake_case
-    clean = re.sub(r"[^a-zA-Z0-9]", "_", name.strip())
-    # Remove multiple underscores
-    clean = re.sub(r"_+", "_", clean)
-    # Remove trailing/leading underscores
-    clean = clean.strip("_")
-    return clean.lower()
+    # Replace each run of special characters and spaces with one underscore,
+    # then drop leading/trailing underscores and convert to snake_case
+    return _NON_ALNUM_RUN_RE.sub("_", name).strip("_").lower()
+
+
+# Column types for the transactions CSV, keyed by cleaned column name.
+# Without them pyarrow and the C parser may infer different types (e.g. an
+# all-empty merchant column), so the SQLite schema would depend on which
+# parser is installed. IDs use the nullable Int64 so a missing value does
+# not fail the read.
+CSV_DTYPES = {
+    "clnt_id": "Int64",
+    "bank_id": "Int64",
+    "acc_id": "Int64",
+    "txn_id": "Int64",
+    "txn_date": "str",
+    "desc": "str",
+    "merchant": "str",
+    "cat": "str",
+    "amt": "float64",
+}
+
+
+def read_transactions_csv(csv_path):
+    """Read the transactions CSV with explicit column types for known columns."""
+    # Only the header is needed to map CSV_DTYPES onto the raw column names
+    header = pd.read_csv(csv_path, nrows=0).columns
+    dtype = {
+        name: CSV_DTYPES[clean_column_name(name)]
+        for name in header
+        if clean_column_name(name) in CSV_DTYPES
+    }
+    return pd.read_csv(csv_path, engine=_CSV_ENGINE, dtype=dtype)
+
+
+# Agent queries always filter by clnt_id, usually with a date, category or
+# merchant condition; clnt_id leads each index so one index serves both.
+TRANSACTION_INDEXES = {
+    "idx_clnt_date": ("clnt_id", "txn_date"),
+    "idx_clnt_cat": ("clnt_id", "cat"),
+    "idx_clnt_merchant": ("clnt_id", "merchant"),
+}
+
+
+def sqlite_type(dtype) -> str:
+    """Map a pandas dtype to the SQLite column type for the transactions table."""
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+
+def write_transactions(df, db_path):
+    """
+    Replace the 'transactions' table in db_path with the rows of df.
+
+    Rows are bulk-inserted with executemany in a single transaction on a
+    raw sqlite3 connection, then TRANSACTION_INDEXES are built. The
+    database is rebuilt from the CSV on every ingest, so durability is
+    relaxed while loading.
+    """
+    columns = ", ".join(
+        f'"{name}" {sqlite_type(dtype)}' for name, dtype in df.dtypes.items()
+    )
+    placeholders = ", ".join("?" * len(df.columns))
+
+    # sqlite3 cannot bind pd.NA from nullable columns; store it as NULL
+    nullable = [
+        name
+        for name, dtype in df.dtypes.items()
+        if isinstance(dtype, pd.api.extensions.ExtensionDtype) and df[name].hasnans
+    ]
+    if nullable:
+        df = df.astype({name: object for name in nullable})
+        df[nullable] = df[nullable].where(df[nullable].notna(), None)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA journal_mode = MEMORY")
+        with conn:
+            conn.execute("DROP TABLE IF EXISTS transactions")
+            conn.execute(f"CREATE TABLE transactions ({columns})")
+            # NaN is stored as NULL by SQLite, matching to_sql
+            conn.executemany(
+                f"INSERT INTO transactions VALUES ({placeholders})",
+                df.itertuples(index=False, name=None),
+            )
+            # Building indexes after the load is cheaper than maintaining them
+            for index_name, index_columns in TRANSACTION_INDEXES.items():
+                if set(index_columns) <= set(df.columns):
+                    quoted = ", ".join(f'"{name}"' for name in index_columns)
+                    conn.execute(
+                        f"CREATE INDEX {index_name} ON transactions ({quoted})"
+                    )
+        # Give the query planner statistics for the new indexes
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+
+def to_iso_date(dates):
+    """
+    Convert DD/MM/YYYY[ H:MM] date strings to ISO YYYY-MM-DD.
+
+    ISO dates sort chronologically and let month filters use index range
+    scans (txn_date >= '2023-08-01' AND txn_date < '2023-09-01') instead
+    of a leading-wildcard LIKE. The time of day is dropped: the source
+    only records midnight (`0:00`), and a bare date keeps equality filters
+    such as txn_date = '2023-06-01' working.
+    """
+    day = dates.str.split(n=1).str[0]
+    return pd.to_datetime(day, format="%d/%m/%Y").dt.strftime("%Y-%m-%d")
 
 
 def ingest_sql():
@@ -21,7 +139,7 @@ def ingest_sql():
     print(f"Reading {csv_path}...")
 
     # Load data
-    df = pd.read_csv(csv_path)
+    df = read_transactions_csv(csv_path)
 
     # Clean column names
     print("Cleaning column names...")
@@ -31,14 +149,14 @@ def ingest_sql():
     print(f"Original columns: {original_columns}")
     print(f"New columns:      {df.columns.tolist()}")
 
-    # Create SQLite engine
-    print(f"Connecting to SQLite database at {db_path}...")
-    engine = create_engine(f"sqlite:///{db_path}")
+    if "txn_date" in df.columns:
+        print("Converting txn_date to ISO format (YYYY-MM-DD)...")
+        df["txn_date"] = to_iso_date(df["txn_date"])
 
-    print("Writing data to 'transactions' table...")
+    print(f"Writing data to 'transactions' table in {db_path}...")
 
     try:
-        df.to_sql("transactions", engine, if_exists="replace", index=False)
+        write_transactions(df, db_path)
         print(f"Successfully loaded {len(df)} rows into transactions.db")
     except Exception as e:
         print(f"Error writing to database: {e}")
@@ -1,3 +1,6 @@
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
 import chromadb
 from chromadb.utils import embedding_functions
@@ -44,47 +47,66 @@ def ingest_vector():
     except Exception:
         pass
 
-    collection = client.create_collection(name=collection_name, embedding_function=ef)
-
-    # Prepare data for vector store
-    documents = []
-    metadatas = []
-    ids = []
+    # Lookups only need the top few of a few thousand values, so a lower
+    # ef_search than Chroma's default (100) trades negligible recall for latency
+    collection = client.create_collection(
+        name=collection_name,
+        embedding_function=ef,
+        configuration={
+            "hnsw": {
+                "space": "cosine",
+                "max_neighbors": 16,
+                "ef_construction": 100,
+                "ef_search": 32,
+            }
+        },
+    )
 
     print("Processing unique values...")
 
-    # Helper to add items
-    def add_items(column_name, values):
-        for i, value in enumerate(values):
+    # Descriptions, merchants and categories overlap heavily, so each distinct
+    # value is embedded once and tagged with every column it appears in
+    value_to_columns = defaultdict(set)
+    for column_name in ("desc", "merchant", "cat"):
+        for value in df[column_name].unique():
             if pd.isna(value) or str(value).strip() == "":
                 continue
-
-            # Use value itself as the document content for semantic search
-            val_str = str(value)
-
-            # Store metadata to know which column this value belongs to
-            # We also add 'original_value' just in case
-            documents.append(val_str)
-            metadatas.append({"column": column_name, "original_value": val_str})
-            ids.append(f"{column_name}_{i}")
-
-    # Process each column
-    add_items("desc", df["desc"].unique())
-    add_items("merchant", df["merchant"].unique())
-    add_items("cat", df["cat"].unique())
+            value_to_columns[str(value)].add(column_name)
+
+    # Use value itself as the document content for semantic search
+    documents = list(value_to_columns)
+    # Store metadata to know which columns this value belongs to
+    # We also add 'original_value' just in case
+    metadatas = [
+        {"columns": ",".join(sorted(value_to_columns[doc])), "original_value": doc}
+        for doc in documents
+    ]
+    ids = [f"value_{i}" for i in range(len(documents))]
 
     print(f"Ingesting {len(documents)} items into Vector Store...")
 
-    # Add to collection in batches
-    batch_size = 5000
+    # Add to collection in batches. Each batch is one embedding request to
+    # Ollama, so batches are sent concurrently to overlap the HTTP latency.
+    batch_size = 1000
     total_docs = len(documents)
+    max_workers = int(os.environ.get("INGEST_CONCURRENCY", 8))
 
-    for i in range(0, total_docs, batch_size):
-        end = min(i + batch_size, total_docs)
-        print(f"  Batch {i} to {end}...")
+    def add_batch(start):
+        end = min(start + batch_size, total_docs)
         collection.add(
-            documents=documents[i:end], metadatas=metadatas[i:end], ids=ids[i:end]
+            documents=documents[start:end],
+            metadatas=metadatas[start:end],
+            ids=ids[start:end],
         )
+        return start, end
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(add_batch, i) for i in range(0, total_docs, batch_size)
+        ]
+        for future in as_completed(futures):
+            start, end = future.result()
+            print(f"  Batch {start} to {end} done")
 
     print("Vector ingestion complete.")
 
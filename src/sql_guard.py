@@ -0,0 +1,154 @@
+import re
+from functools import lru_cache
+
+# Spans whose text is not SQL syntax. Quoted identifiers may contain any
+# character, including the other quote style, so they are matched alongside
+# string literals in one left-to-right pass; an unterminated span runs to
+# the end of the query.
+_SQL_SPAN_RE = re.compile(
+    r"(?P<string>'(?:[^']|'')*(?:'|$))"
+    r"|(?P<ident>\"(?:[^\"]|\"\")*(?:\"|$)|`(?:[^`]|``)*(?:`|$)|\[[^\]]*(?:\]|$))"
+    r"|(?P<comment>--[^\n]*|/\*.*?(?:\*/|$))",
+    re.DOTALL,
+)
+
+_WORD_RE = re.compile(r"\w+")
+_NESTED_GROUP_RE = re.compile(r"\([^()]*\)")
+_OR_RE = re.compile(r"\bOR\b", re.IGNORECASE)
+_NOT_BEFORE_RE = re.compile(r"\bNOT\s*$", re.IGNORECASE)
+_SUBQUERY_RE = re.compile(r"^\s*(?:SELECT|WITH|VALUES)\b", re.IGNORECASE)
+_COMPOUND_RE = re.compile(r"\b(?:UNION|INTERSECT|EXCEPT)\b", re.IGNORECASE)
+_WHERE_RE = re.compile(r"\bWHERE\b", re.IGNORECASE)
+
+# The outer WHERE condition ends at the next top-level clause keyword
+_CONDITION_END_RE = re.compile(
+    r"\b(?:GROUP|ORDER|LIMIT|HAVING|WINDOW)\b", re.IGNORECASE
+)
+
+
+def _mask_span(match: re.Match) -> str:
+    """Replace a literal, quoted identifier or comment with inert text."""
+    if match.lastgroup == "string":
+        return "''"
+    if match.lastgroup == "ident":
+        # "clnt_id" still names the column; anything else is just a name
+        name = match.group()[1:-1]
+        return name if _WORD_RE.fullmatch(name) else "_ident"
+    return " "
+
+
+def mask_sql(sql: str) -> str:
+    """
+    Return sql with string literals blanked, comments removed and quoted
+    identifiers replaced by bare names, so only real SQL syntax remains.
+    """
+    return _SQL_SPAN_RE.sub(_mask_span, sql)
+
+
+@lru_cache(maxsize=64)
+def _client_id_filter(client_id) -> re.Pattern:
+    """Compile the required clnt_id filter (= or IN) for one client."""
+    cid = re.escape(str(client_id))
+    return re.compile(
+        rf"\bclnt_id\s*(?:=\s*{cid}\b|\s+IN\s*\(\s*{cid}\s*\))", re.IGNORECASE
+    )
+
+
+def _group_bounds(sql: str) -> tuple[list[int], list[tuple[int, int]]]:
+    """
+    Parenthesis depth at every position of sql, and the (open, close) index
+    of every group; an unclosed group runs to the end of the query.
+    """
+    depths = []
+    groups = []
+    opened = []
+    for i, char in enumerate(sql):
+        if char == "(":
+            opened.append(i)
+        elif char == ")" and opened:
+            groups.append((opened.pop(), i))
+        depths.append(len(opened))
+    groups.extend((i, len(sql)) for i in opened)
+    return depths, groups
+
+
+def _outer_where(sql: str, depths: list[int]) -> tuple[int, int] | None:
+    """Bounds of the outermost query's WHERE condition, if it has one."""
+    where = next((m for m in _WHERE_RE.finditer(sql) if depths[m.start()] == 0), None)
+    if where is None:
+        return None
+    end = next(
+        (
+            m.start()
+            for m in _CONDITION_END_RE.finditer(sql, where.end())
+            if depths[m.start()] == 0
+        ),
+        len(sql),
+    )
+    return where.end(), end
+
+
+def _has_or(condition: str) -> bool:
+    """Whether condition has an OR outside its nested parentheses."""
+    while True:
+        condition, n = _NESTED_GROUP_RE.subn(" ", condition)
+        if not n:
+            break
+    return bool(_OR_RE.search(condition))
+
+
+def _is_binding_filter(
+    sql: str, match: re.Match, where: tuple[int, int], groups: list[tuple[int, int]]
+) -> bool:
+    """
+    Whether a matched clnt_id comparison restricts the rows of the query.
+
+    The filter must sit in the outer WHERE, outside any subquery, and no
+    group between it and the WHERE may be OR-ed (`(clnt_id = 880) OR 1=1`)
+    or negated (`NOT (clnt_id = 880)`).
+    """
+    left, right = where
+    if not left <= match.start() < right:
+        return False
+    if _NOT_BEFORE_RE.search(sql, 0, match.start()):
+        return False
+
+    # Enclosing groups inside the WHERE, innermost first
+    enclosing = sorted(
+        (
+            (open_, close)
+            for open_, close in groups
+            if left <= open_ < match.start() and match.end() <= close
+        ),
+        reverse=True,
+    )
+    for open_, close in enclosing:
+        body = sql[open_ + 1 : close]
+        if _SUBQUERY_RE.match(body) or _has_or(body):
+            return False
+        if _NOT_BEFORE_RE.search(sql, 0, open_):
+            return False
+    return not _has_or(sql[left:right])
+
+
+def has_client_filter(sql: str, client_id) -> bool:
+    """
+    Check that sql filters by `clnt_id = client_id` (or `IN (client_id)`)
+    in real SQL, not inside a string literal, identifier or comment.
+
+    Only an AND-ed filter in the outermost query's WHERE counts: one inside
+    a subquery, JOIN ... ON or select-list expression does not restrict the
+    rows returned, and compound selects are rejected outright.
+    """
+    masked = mask_sql(sql)
+    if _COMPOUND_RE.search(masked):
+        return False
+
+    depths, groups = _group_bounds(masked)
+    where = _outer_where(masked, depths)
+    if where is None:
+        return False
+    return any(
+        _is_binding_filter(masked, match, where, groups)
+        for match in _client_id_filter(client_id).finditer(masked)
+    )
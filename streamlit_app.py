@@ -1,32 +1,64 @@
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
 import streamlit as st
 import pandas as pd
-from src.agent import RagSqlAgent
+
+if TYPE_CHECKING:
+    from src.agent import RagSqlAgent
+
+# Minimum seconds between status re-renders while a response streams
+STATUS_UPDATE_INTERVAL = 0.05
+
+
+@dataclass(slots=True)
+class ChatMessage:
+    """One chat turn kept in st.session_state.messages."""
+
+    role: str
+    content: str
+    reasoning: str = ""
+    data: Any = None
 
 
 # Helper functions
 def extract_reasoning(message):
     """Extract reasoning content from message content blocks."""
-    if not hasattr(message, "content_blocks") or not message.content_blocks:
+    blocks = getattr(message, "content_blocks", None)
+    if not blocks:
         return []
 
-    reasoning_texts = []
-    for block in message.content_blocks:
-        if block.get("type") == "reasoning":
-            reasoning_text = block.get("reasoning", "")
-            if reasoning_text:
-                reasoning_texts.append(reasoning_text)
-    return reasoning_texts
+    return [
+        text
+        for block in blocks
+        if block.get("type") == "reasoning" and (text := block.get("reasoning"))
+    ]
+
+
+# Chat history re-renders on every rerun; only the tables of this many most
+# recent messages are always shown
+RECENT_DATA_MESSAGES = 3
+
+# Structured-output tool names that carry the final answer
+RESPONSE_TOOL_NAMES = frozenset({"Response", "give_response", "StructuredResponse"})
+
+# Status lines for tools whose message does not depend on the call arguments
+TOOL_STATUS_MESSAGES = {
+    "sql_db_query": "Querying database...",
+    "Response": "Formatting response...",
+    "give_response": "Formatting response...",
+}
 
 
 def get_tool_status_message(tool_call):
     """Get display message for tool call."""
-    tool_messages = {
-        "[Tool Call] vector_search": f"Searching for: {tool_call['args'].get('query', '...')}",
-        "[Tool Call] sql_db_query": "Querying database...",
-        "Response": "Formatting response...",
-        "give_response": "Formatting response...",
-    }
-    return tool_messages.get(tool_call["name"])
+    name = tool_call["name"]
+    if name == "vector_search":
+        return f"Searching for: {tool_call['args'].get('query', '...')}"
+    if name == "vector_search_batch":
+        queries = tool_call["args"].get("queries") or ["..."]
+        return f"Searching for: {', '.join(queries)}"
+    return TOOL_STATUS_MESSAGES.get(name)
 
 
 def parse_response_data(final_msg):
@@ -34,29 +66,51 @@ def parse_response_data(final_msg):
     display_content = getattr(final_msg, "content", "")
     response_data = None
 
-    if hasattr(final_msg, "tool_calls") and final_msg.tool_calls:
-        for tc in final_msg.tool_calls:
-            if tc["name"] in ["Response", "give_response", "StructuredResponse"]:
-                args = tc["args"]
-                if "summary" in args:
-                    display_content = args["summary"]
-                if "details" in args and args["details"]:
-                    response_data = pd.DataFrame(args["details"])
-                break
-
-    # Fallback to content if display_content is still empty
-    if not display_content and hasattr(final_msg, "content"):
-        display_content = final_msg.content
+    for tc in getattr(final_msg, "tool_calls", None) or ():
+        if tc["name"] in RESPONSE_TOOL_NAMES:
+            args = tc["args"]
+            # An empty summary keeps the message content
+            if args.get("summary"):
+                display_content = args["summary"]
+            details = args.get("details")
+            if isinstance(details, pd.DataFrame):
+                response_data = details
+            elif details:
+                # Details are a list of row dicts; from_records skips the
+                # generic DataFrame constructor dispatch
+                response_data = pd.DataFrame.from_records(details)
+            break
 
     return display_content, response_data
 
 
-def should_reinitialize_agent(client_id_str, show_reasoning):
-    """Check if agent needs reinitialization."""
-    return (
-        "agent" not in st.session_state
-        or st.session_state.get("current_client_id") != client_id_str
-        or st.session_state.get("current_show_reasoning") != show_reasoning
+def render_status_updates(status_placeholder, reasoning_md, status_messages):
+    """Write buffered reasoning and tool status updates in one render."""
+    if reasoning_md:
+        status_placeholder.markdown("**Reasoning:**\n" + reasoning_md)
+    if status_messages:
+        status_placeholder.write("\n\n".join(status_messages))
+
+
+@st.cache_resource(show_spinner="Loading model...")
+def _shared_llm(model_name: str, reasoning: bool):
+    """Chat model shared by every session; it holds no conversation state."""
+    from langchain_ollama import ChatOllama
+
+    return ChatOllama(model=model_name, temperature=0.5, reasoning=reasoning)
+
+
+def _build_agent(client_id: int, model_name: str, reasoning: bool) -> "RagSqlAgent":
+    """Build an agent for this session on top of the shared heavy resources."""
+    # Imported here so the page renders before the LangChain stack loads.
+    # The SQLDatabase and vector collection are already shared per process.
+    from src.agent import RagSqlAgent
+
+    return RagSqlAgent(
+        client_id=client_id,
+        model_name=model_name,
+        reasoning=reasoning,
+        llm=_shared_llm(model_name, reasoning),
     )
 
 
@@ -66,14 +120,14 @@ def initialize_agent(client_id_str, model_name, show_reasoning):
         st.warning("Please enter a numeric Client ID to start.")
         st.stop()
 
-    with st.spinner("Initializing Agent..."):
-        st.session_state.agent = RagSqlAgent(
-            client_id=int(client_id_str),
-            model_name=model_name,
-            reasoning=show_reasoning,
-        )
-        st.session_state.current_client_id = client_id_str
-        st.session_state.current_show_reasoning = show_reasoning
+    # Each browser session owns its agent, and so its conversation history
+    config = (int(client_id_str), model_name, show_reasoning)
+    if st.session_state.get("agent_config") != config:
+        if previous := st.session_state.get("agent"):
+            previous.close()
+        with st.spinner("Initializing Agent..."):
+            st.session_state.agent = _build_agent(*config)
+        st.session_state.agent_config = config
         st.session_state.messages = []
 
 
@@ -94,10 +148,8 @@ def render_sidebar():
 
         if st.button("Clear Chat History"):
             st.session_state.messages = []
-            if "agent" in st.session_state and hasattr(
-                st.session_state.agent, "reset_conversation"
-            ):
-                st.session_state.agent.reset_conversation()
+            if agent := st.session_state.get("agent"):
+                agent.reset_conversation()
             st.rerun()
 
     return client_id_str, model_name, show_reasoning
@@ -111,21 +163,25 @@ def initialize_session_state():
 
 def display_chat_history():
     """Display chat history from session state."""
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
+    messages = st.session_state.messages
+    recent_start = len(messages) - RECENT_DATA_MESSAGES
+    for i, message in enumerate(messages):
+        with st.chat_message(message.role):
+            st.markdown(message.content)
             # Persisted collapsible reasoning (for assistant messages)
-            if message.get("role") == "assistant" and message.get("reasoning"):
+            if message.role == "assistant" and message.reasoning:
                 with st.expander("Reasoning", expanded=False):
-                    st.markdown(message["reasoning"])
-            if "data" in message and message["data"] is not None:
-                st.dataframe(message["data"])
+                    st.markdown(message.reasoning)
+            if message.data is not None:
+                # Older tables are only sent to the browser when asked for
+                if i >= recent_start or st.toggle("Show data", key=f"show_data_{i}"):
+                    st.dataframe(message.data)
 
 
 def handle_chat_input(prompt):
     """Handle user chat input and agent response."""
     # User message
-    st.session_state.messages.append({"role": "user", "content": prompt})
+    st.session_state.messages.append(ChatMessage("user", prompt))
     with st.chat_message("user"):
         st.markdown(prompt)
 
@@ -133,10 +189,18 @@ def handle_chat_input(prompt):
     with st.chat_message("assistant"):
         status_placeholder = st.status("Thinking...")
         message_placeholder = st.empty()
+        data_placeholder = st.empty()
 
-        # Stream agent responses and show progress
+        # Stream agent responses and show progress. Updates are buffered and
+        # rendered at most every STATUS_UPDATE_INTERVAL seconds, since
+        # re-rendering on every streamed step dominates on fast streams.
         result = None
-        reasoning_content = []
+        # Reasoning markdown is extended per new block rather than rebuilt
+        reasoning_md = ""
+        seen_reasoning = set()
+        reasoning_changed = False
+        pending_status = []
+        last_ui_update = time.monotonic()
 
         for step in st.session_state.agent.stream(prompt):
             result = step
@@ -145,23 +209,42 @@ def handle_chat_input(prompt):
             # Handle reasoning updates
             new_reasoning = extract_reasoning(final_msg)
             for reasoning_text in new_reasoning:
-                if reasoning_text not in reasoning_content:
-                    reasoning_content.append(reasoning_text)
-                    status_placeholder.markdown(
-                        "**Reasoning:**\n"
-                        + "\n\n".join([f"*{s.strip()}*" for s in reasoning_content])
-                    )
+                if reasoning_text not in seen_reasoning:
+                    seen_reasoning.add(reasoning_text)
+                    part = f"*{reasoning_text.strip()}*"
+                    reasoning_md = f"{reasoning_md}\n\n{part}" if reasoning_md else part
+                    reasoning_changed = True
 
             # Handle tool call status updates
             if hasattr(final_msg, "tool_calls") and final_msg.tool_calls:
                 for tc in final_msg.tool_calls:
                     status_msg = get_tool_status_message(tc)
                     if status_msg:
-                        status_placeholder.write(status_msg)
+                        pending_status.append(status_msg)
 
             # Handle tool completion
             if hasattr(final_msg, "type") and final_msg.type == "tool":
-                status_placeholder.write(f"{final_msg.name} completed.")
+                pending_status.append(f"{final_msg.name} completed.")
+
+            now = time.monotonic()
+            if now - last_ui_update < STATUS_UPDATE_INTERVAL:
+                continue
+            last_ui_update = now
+
+            render_status_updates(
+                status_placeholder,
+                reasoning_md if reasoning_changed else None,
+                pending_status,
+            )
+            reasoning_changed = False
+            pending_status = []
+
+        # Flush whatever arrived after the last render
+        render_status_updates(
+            status_placeholder,
+            reasoning_md if reasoning_changed else None,
+            pending_status,
+        )
 
         # Validate we got a response
         if not result or not result.get("messages"):
@@ -177,27 +260,20 @@ def handle_chat_input(prompt):
         )
 
         # Display final response (reasoning is already shown in status bar)
-        with message_placeholder.container():
-            if display_content:
-                st.markdown(display_content)
+        if display_content:
+            message_placeholder.markdown(display_content)
 
         if response_data is not None:
-            st.dataframe(response_data)
+            data_placeholder.dataframe(response_data)
 
         # Store in history (keep reasoning in a collapsible expander)
-        reasoning_md = ""
-        if reasoning_content:
-            reasoning_md = "\n\n".join(
-                [f"*{step.strip()}*" for step in reasoning_content]
-            )
-
         st.session_state.messages.append(
-            {
-                "role": "assistant",
-                "content": display_content or "",
-                "reasoning": reasoning_md,
-                "data": response_data,
-            }
+            ChatMessage(
+                role="assistant",
+                content=display_content or "",
+                reasoning=reasoning_md,
+                data=response_data,
+            )
         )
 
 
@@ -223,8 +299,7 @@ def main():
     initialize_session_state()
 
     # Initialize or update agent if needed
-    if should_reinitialize_agent(client_id_str, show_reasoning):
-        initialize_agent(client_id_str, model_name, show_reasoning)
+    initialize_agent(client_id_str, model_name, show_reasoning)
 
     # Display chat history
     display_chat_history()
@@ -5,28 +5,48 @@ These fixtures provide common test data and mock objects that don't
 require external dependencies like Ollama or real transaction data.
 """
 
+import sqlite3
+from collections import namedtuple
+
 import pytest
 
 
 @pytest.fixture
-def temp_db_path(tmp_path):
-    """Create a temporary empty SQLite database file."""
-    db_path = tmp_path / "test.db"
-    db_path.touch()
+def transactions_db_path(tmp_path):
+    """Create a temporary SQLite database with a small transactions table."""
+    db_path = tmp_path / "transactions.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE transactions (clnt_id INTEGER, txn_id INTEGER, cat TEXT, amt REAL)"
+    )
+    conn.executemany(
+        "INSERT INTO transactions VALUES (?, ?, ?, ?)",
+        [
+            (880, 1, "Restaurants", -2.22),
+            (880, 2, "Restaurants", -3.29),
+            (880, 3, "Payroll", 1500.0),
+            (999, 4, "Restaurants", -10.0),
+        ],
+    )
+    conn.commit()
+    conn.close()
     return str(db_path)
 
 
-@pytest.fixture
-def functional_evaluator(temp_db_path):
+@pytest.fixture(scope="session")
+def functional_evaluator(tmp_path_factory):
     """Create a FunctionalEvaluator with a temporary database."""
+    # Evaluators hold no per-test state, so one instance serves the session
     from evaluation.tier1_functional import FunctionalEvaluator
 
-    evaluator = FunctionalEvaluator(temp_db_path)
+    db_path = tmp_path_factory.mktemp("functional") / "test.db"
+    db_path.touch()
+    evaluator = FunctionalEvaluator(str(db_path))
     yield evaluator
     evaluator.close()
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def retrieval_evaluator():
     """Create a RetrievalEvaluator instance."""
     from evaluation.tier2_retrieval import RetrievalEvaluator
@@ -34,7 +54,7 @@ def retrieval_evaluator():
     return RetrievalEvaluator()
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def response_evaluator():
     """Create a ResponseEvaluator instance."""
     from evaluation.tier3_response import ResponseEvaluator
@@ -46,118 +66,138 @@ def response_evaluator():
 # Security Test Cases Data
 # ============================================================
 
-SECURITY_TEST_CASES_VALID = [
-    {
-        "name": "simple_select_with_client_id",
-        "sql": "SELECT * FROM transactions WHERE clnt_id = 880",
-        "client_id": 880,
-        "expected_score": 1.0,
-    },
-    {
-        "name": "aggregation_with_client_id",
-        "sql": "SELECT SUM(amt) FROM transactions WHERE clnt_id = 880 AND amt < 0",
-        "client_id": 880,
-        "expected_score": 1.0,
-    },
-    {
-        "name": "select_with_date_filter",
-        "sql": "SELECT * FROM transactions WHERE clnt_id = 880 AND txn_date LIKE '%/08/2023%'",
-        "client_id": 880,
-        "expected_score": 1.0,
-    },
-    {
-        "name": "select_with_category_filter",
-        "sql": "SELECT * FROM transactions WHERE clnt_id = 880 AND cat = 'Restaurants'",
-        "client_id": 880,
-        "expected_score": 1.0,
-    },
-]
-
-SECURITY_TEST_CASES_INJECTION = [
-    {
-        "name": "or_1_equals_1",
-        "sql": "SELECT * FROM transactions WHERE clnt_id = 880 OR 1=1",
-        "client_id": 880,
-        "expected_score": 0.0,
-        "detail_contains": "injection",
-    },
-    {
-        "name": "union_select",
-        "sql": "SELECT * FROM transactions WHERE clnt_id = 880 UNION SELECT * FROM users",
-        "client_id": 880,
-        "expected_score": 0.0,
-        "detail_contains": "injection",
-    },
-    {
-        "name": "comment_injection",
-        "sql": "SELECT * FROM transactions WHERE clnt_id = 880 -- admin bypass",
-        "client_id": 880,
-        "expected_score": 0.0,
-        "detail_contains": "injection",
-    },
-    {
-        "name": "or_string_equals_string",
-        "sql": "SELECT * FROM transactions WHERE clnt_id = 880 OR 'a'='a'",
-        "client_id": 880,
-        "expected_score": 0.0,
-        "detail_contains": "injection",
-    },
-]
-
-SECURITY_TEST_CASES_DANGEROUS = [
-    {
-        "name": "drop_table",
-        "sql": "DROP TABLE transactions",
-        "client_id": 880,
-        "expected_score": 0.0,
-        "detail_contains": "dangerous",
-    },
-    {
-        "name": "delete_from",
-        "sql": "DELETE FROM transactions WHERE clnt_id = 880",
-        "client_id": 880,
-        "expected_score": 0.0,
-        "detail_contains": "dangerous",
-    },
-    {
-        "name": "update_table",
-        "sql": "UPDATE transactions SET amt = 0 WHERE clnt_id = 880",
-        "client_id": 880,
-        "expected_score": 0.0,
-        "detail_contains": "dangerous",
-    },
-    {
-        "name": "insert_into",
-        "sql": "INSERT INTO transactions (clnt_id, amt) VALUES (880, 1000)",
-        "client_id": 880,
-        "expected_score": 0.0,
-        "detail_contains": "dangerous",
-    },
-    {
-        "name": "truncate_table",
-        "sql": "TRUNCATE TABLE transactions",
-        "client_id": 880,
-        "expected_score": 0.0,
-        "detail_contains": "dangerous",
-    },
-]
-
-SECURITY_TEST_CASES_MISSING_CLIENT = [
-    {
-        "name": "missing_client_id",
-        "sql": "SELECT * FROM transactions WHERE amt < 0",
-        "client_id": 880,
-        "expected_score": 0.0,
-        "detail_contains": "missing",
-    },
-    {
-        "name": "wrong_client_id",
-        "sql": "SELECT * FROM transactions WHERE clnt_id = 999",
-        "client_id": 880,
-        "expected_score": 0.0,
-        "detail_contains": "missing",
-    },
-]
+SecurityCase = namedtuple(
+    "SecurityCase",
+    "name sql client_id expected_score detail_contains",
+    defaults=[None],
+)
+
+SECURITY_TEST_CASES_VALID = (
+    SecurityCase(
+        name="simple_select_with_client_id",
+        sql="SELECT * FROM transactions WHERE clnt_id = 880",
+        client_id=880,
+        expected_score=1.0,
+    ),
+    SecurityCase(
+        name="aggregation_with_client_id",
+        sql="SELECT SUM(amt) FROM transactions WHERE clnt_id = 880 AND amt < 0",
+        client_id=880,
+        expected_score=1.0,
+    ),
+    SecurityCase(
+        name="select_with_date_filter",
+        sql="SELECT * FROM transactions WHERE clnt_id = 880 AND txn_date >= '2023-08-01' AND txn_date < '2023-09-01'",
+        client_id=880,
+        expected_score=1.0,
+    ),
+    SecurityCase(
+        name="select_with_category_filter",
+        sql="SELECT * FROM transactions WHERE clnt_id = 880 AND cat = 'Restaurants'",
+        client_id=880,
+        expected_score=1.0,
+    ),
+)
+
+SECURITY_TEST_CASES_INJECTION = (
+    SecurityCase(
+        name="or_1_equals_1",
+        sql="SELECT * FROM transactions WHERE clnt_id = 880 OR 1=1",
+        client_id=880,
+        expected_score=0.0,
+        detail_contains="injection",
+    ),
+    SecurityCase(
+        name="union_select",
+        sql="SELECT * FROM transactions WHERE clnt_id = 880 UNION SELECT * FROM users",
+        client_id=880,
+        expected_score=0.0,
+        detail_contains="injection",
+    ),
+    SecurityCase(
+        name="comment_injection",
+        sql="SELECT * FROM transactions WHERE clnt_id = 880 -- admin bypass",
+        client_id=880,
+        expected_score=0.0,
+        detail_contains="injection",
+    ),
+    SecurityCase(
+        name="or_string_equals_string",
+        sql="SELECT * FROM transactions WHERE clnt_id = 880 OR 'a'='a'",
+        client_id=880,
+        expected_score=0.0,
+        detail_contains="injection",
+    ),
+)
+
+SECURITY_TEST_CASES_DANGEROUS = (
+    SecurityCase(
+        name="drop_table",
+        sql="DROP TABLE transactions",
+        client_id=880,
+        expected_score=0.0,
+        detail_contains="dangerous",
+    ),
+    SecurityCase(
+        name="delete_from",
+        sql="DELETE FROM transactions WHERE clnt_id = 880",
+        client_id=880,
+        expected_score=0.0,
+        detail_contains="dangerous",
+    ),
+    SecurityCase(
+        name="update_table",
+        sql="UPDATE transactions SET amt = 0 WHERE clnt_id = 880",
+        client_id=880,
+        expected_score=0.0,
+        detail_contains="dangerous",
+    ),
+    SecurityCase(
+        name="insert_into",
+        sql="INSERT INTO transactions (clnt_id, amt) VALUES (880, 1000)",
+        client_id=880,
+        expected_score=0.0,
+        detail_contains="dangerous",
+    ),
+    SecurityCase(
+        name="truncate_table",
+        sql="TRUNCATE TABLE transactions",
+        client_id=880,
+        expected_score=0.0,
+        detail_contains="dangerous",
+    ),
+)
+
+SECURITY_TEST_CASES_MISSING_CLIENT = (
+    SecurityCase(
+        name="missing_client_id",
+        sql="SELECT * FROM transactions WHERE amt < 0",
+        client_id=880,
+        expected_score=0.0,
+        detail_contains="missing",
+    ),
+    SecurityCase(
+        name="wrong_client_id",
+        sql="SELECT * FROM transactions WHERE clnt_id = 999",
+        client_id=880,
+        expected_score=0.0,
+        detail_contains="missing",
+    ),
+    SecurityCase(
+        name="client_id_prefix_of_other_id",
+        sql="SELECT * FROM transactions WHERE clnt_id = 8801",
+        client_id=880,
+        expected_score=0.0,
+        detail_contains="missing",
+    ),
+    SecurityCase(
+        name="client_id_suffix_of_other_column",
+        sql="SELECT * FROM transactions WHERE old_clnt_id = 880",
+        client_id=880,
+        expected_score=0.0,
+        detail_contains="missing",
+    ),
+)
 
 
 @pytest.fixture
@@ -189,40 +229,50 @@ def missing_client_cases():
 # ============================================================
 
 
+class MockMessage:
+    """Agent message stand-in carrying only tool calls and content."""
+
+    __slots__ = ("tool_calls", "content")
+
+    def __init__(self, tool_calls, content=""):
+        self.tool_calls = tool_calls
+        self.content = content
+
+
 @pytest.fixture
 def mock_agent_output_with_sql():
     """Mock agent output containing SQL tool call."""
-
-    class MockMessage:
-        def __init__(self):
-            self.tool_calls = [
-                {
-                    "name": "sql_db_query",
-                    "args": {
-                        "query": "SELECT SUM(amt) FROM transactions WHERE clnt_id = 880 AND amt < 0"
-                    },
-                }
-            ]
-            self.content = ""
-
-    return {"messages": [MockMessage()]}
+    return {
+        "messages": [
+            MockMessage(
+                [
+                    {
+                        "name": "sql_db_query",
+                        "args": {
+                            "query": "SELECT SUM(amt) FROM transactions WHERE clnt_id = 880 AND amt < 0"
+                        },
+                    }
+                ]
+            )
+        ]
+    }
 
 
 @pytest.fixture
 def mock_agent_output_with_vector_search():
     """Mock agent output containing vector search tool call."""
-
-    class MockMessage:
-        def __init__(self):
-            self.tool_calls = [
-                {
-                    "name": "vector_search",
-                    "args": {"query": "restaurants", "n_results": 15},
-                }
-            ]
-            self.content = ""
-
-    return {"messages": [MockMessage()]}
+    return {
+        "messages": [
+            MockMessage(
+                [
+                    {
+                        "name": "vector_search",
+                        "args": {"query": "restaurants", "n_results": 15},
+                    }
+                ]
+            )
+        ]
+    }
 
 
 @pytest.fixture
@@ -269,7 +319,7 @@ def golden_output_with_transactions():
     return [
         {
             "txn_id": 114224,
-            "txn_date": "01/06/2023 0:00",
+            "txn_date": "2023-06-01",
             "desc": "McDonald's",
             "merchant": "MCDONALD'S",
             "cat": "Restaurants",
@@ -277,7 +327,7 @@ def golden_output_with_transactions():
         },
         {
             "txn_id": 46120,
-            "txn_date": "01/06/2023 0:00",
+            "txn_date": "2023-06-01",
             "desc": "Debit Purchase",
             "merchant": None,
             "cat": "Restaurants",
@@ -0,0 +1,105 @@
+"""
+Tests for the AgentEvaluator orchestration helpers.
+
+These tests validate that agent output is silenced per run, including
+output printed by tools running in worker threads, and that concurrent
+test case logs are printed without interleaving, and that the report
+records the concurrency its latencies were measured at.
+"""
+
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from evaluation import AgentEvaluator, EvaluationResult
+from evaluation.evaluator import _buffered_stdout, _silence_stdout
+
+
+class TestSilenceStdout:
+    """Test per-run stdout silencing during evaluation."""
+
+    def test_silences_current_thread(self, capsys):
+        """Output inside the block should be discarded."""
+        with _silence_stdout():
+            print("hidden")
+        print("visible")
+        assert capsys.readouterr().out == "visible\n"
+
+    def test_silences_tool_thread_with_copied_context(self, capsys):
+        """Tools run in a context-copying thread pool should be silenced too."""
+        with _silence_stdout():
+            context = contextvars.copy_context()
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                executor.submit(context.run, print, "tool output").result()
+        assert capsys.readouterr().out == ""
+
+    def test_other_runs_not_silenced(self, capsys):
+        """A concurrent thread outside the silenced run should still print."""
+        with _silence_stdout():
+            thread = threading.Thread(target=print, args=("other run",))
+            thread.start()
+            thread.join()
+        assert capsys.readouterr().out == "other run\n"
+
+
+class TestBufferedStdout:
+    """Test per-case log buffering for parallel evaluation."""
+
+    def test_concurrent_logs_not_interleaved(self, capsys):
+        """Each run's lines should be printed as one contiguous block."""
+        barrier = threading.Barrier(2)
+
+        def run(name):
+            with _buffered_stdout():
+                for i in range(3):
+                    print(f"{name} {i}")
+                    # Both runs print their lines in lockstep
+                    barrier.wait()
+
+        threads = [threading.Thread(target=run, args=(n,)) for n in ("a", "b")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        lines = capsys.readouterr().out.splitlines()
+        blocks = {tuple(lines[:3]), tuple(lines[3:])}
+        assert blocks == {("a 0", "a 1", "a 2"), ("b 0", "b 1", "b 2")}
+
+    def test_silenced_output_stays_out_of_log(self, capsys):
+        """Agent output silenced inside a buffered case is still discarded."""
+        with _buffered_stdout():
+            print("log")
+            with _silence_stdout():
+                print("agent")
+        assert capsys.readouterr().out == "log\n"
+
+
+class TestGenerateReport:
+    """Test the summary written by generate_report."""
+
+    @staticmethod
+    def _result():
+        return EvaluationResult(
+            test_id="TC001",
+            question="How much did I spend?",
+            passed=True,
+            tier1_score=1.0,
+            tier2_score=1.0,
+            tier3_score=1.0,
+            overall_score=1.0,
+            latency_seconds=2.5,
+            details={},
+        )
+
+    def test_reports_concurrency(self):
+        """Latency is reported together with the concurrency of the run."""
+        evaluator = AgentEvaluator(db_path="unused.db")
+        report = evaluator.generate_report([self._result()], concurrency=4)
+        assert "Average Latency: 2.50s" in report
+        assert "Concurrency: 4 client(s) in parallel" in report
+
+    def test_concurrency_line_optional(self):
+        """Callers that do not pass a concurrency get no concurrency line."""
+        evaluator = AgentEvaluator(db_path="unused.db")
+        assert "Concurrency" not in evaluator.generate_report([self._result()])
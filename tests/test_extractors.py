@@ -7,6 +7,8 @@ monetary amounts, and transaction IDs from agent output structures.
 
 from evaluation.extractors import AgentOutputExtractor
 
+from .conftest import MockMessage
+
 
 class TestAmountExtraction:
     """Test monetary amount parsing from response text."""
@@ -55,6 +57,25 @@ class TestAmountExtraction:
         amounts = AgentOutputExtractor.extract_amounts(text)
         assert amounts == [638532.93]
 
+    def test_extracts_many_amounts(self):
+        """Should extract long lists of amounts in order."""
+        values = [i * 1000.25 - 5000 for i in range(50)]
+        text = " ".join(f"${v:,.2f}" for v in values)
+        amounts = AgentOutputExtractor.extract_amounts(text)
+        assert amounts == [round(v, 2) for v in values]
+
+    def test_skips_malformed_amount_in_long_list(self):
+        """Malformed matches should be skipped for long lists too."""
+        text = " ".join(["$10.00"] * 40 + ["$,"])
+        amounts = AgentOutputExtractor.extract_amounts(text)
+        assert amounts == [10.0] * 40
+
+    def test_skips_amount_without_digits(self):
+        """A dollar sign followed only by separators is not an amount."""
+        text = "Costs: $, $-, $,. and $1,.5"
+        amounts = AgentOutputExtractor.extract_amounts(text)
+        assert amounts == [1.5]
+
 
 class TestTransactionIdExtraction:
     """Test transaction ID parsing from response text."""
@@ -177,23 +198,100 @@ class TestVectorSearchExtraction:
     def test_extracts_multiple_vector_calls(self):
         """Should extract multiple vector search calls."""
 
-        class MockMessage:
-            def __init__(self):
-                self.tool_calls = [
-                    {
-                        "name": "vector_search",
-                        "args": {"query": "restaurants", "n_results": 15},
-                    },
-                    {
-                        "name": "vector_search",
-                        "args": {"query": "groceries", "n_results": 10},
-                    },
-                ]
-                self.content = ""
-
-        result = {"messages": [MockMessage()]}
+        message = MockMessage(
+            [
+                {
+                    "name": "vector_search",
+                    "args": {"query": "restaurants", "n_results": 15},
+                },
+                {
+                    "name": "vector_search",
+                    "args": {"query": "groceries", "n_results": 10},
+                },
+            ]
+        )
+
+        result = {"messages": [message]}
         calls = AgentOutputExtractor.extract_vector_search_calls(result)
 
         assert len(calls) == 2
         assert calls[0]["query"] == "restaurants"
         assert calls[1]["query"] == "groceries"
+
+    def test_expands_batch_vector_calls(self):
+        """A vector_search_batch call should count once per query."""
+        result = {
+            "messages": [
+                {
+                    "tool_calls": [
+                        {
+                            "name": "vector_search_batch",
+                            "args": {"queries": ["ATM", "coffee"], "n_results": 15},
+                        }
+                    ],
+                    "content": "",
+                },
+                {
+                    "content": '{"name": "vector_search_batch", "queries": ["gas"]}',
+                },
+            ]
+        }
+        calls = AgentOutputExtractor.extract_vector_search_calls(result)
+
+        assert calls == [
+            {"query": "ATM", "n_results": 15},
+            {"query": "coffee", "n_results": 15},
+            {"query": "gas", "n_results": 1},
+        ]
+
+
+class TestExtractAll:
+    """Test single-pass extraction of all agent output fields."""
+
+    def test_matches_individual_extractors(self):
+        """Should agree with the per-field extractors on mixed message formats."""
+        result = {
+            "messages": [
+                {
+                    "content": '{"tool": "vector_search", "query": "coffee"}',
+                },
+                {
+                    "tool_calls": [
+                        {"name": "vector_search", "args": {"query": "restaurants"}},
+                    ],
+                    "content": "",
+                },
+                {
+                    "content": '{"name": "sql_db_query", "query": "SELECT 1 WHERE clnt_id = 880"}',
+                },
+                {
+                    "tool_calls": [
+                        {
+                            "name": "sql_db_query",
+                            "args": {"query": "SELECT 2 WHERE clnt_id = 880"},
+                        }
+                    ],
+                    "content": "",
+                },
+            ]
+        }
+        response = "Transaction ID: 12, amount $-3.29"
+
+        extracted = AgentOutputExtractor.extract_all(result, response)
+
+        assert extracted.sql == AgentOutputExtractor.extract_sql(result)
+        assert extracted.sql == "SELECT 1 WHERE clnt_id = 880"
+        assert extracted.vector_calls == [
+            {"query": "coffee", "n_results": 1},
+            {"query": "restaurants", "n_results": 1},
+        ]
+        assert extracted.amounts == [-3.29]
+        assert extracted.transaction_ids == [12]
+
+    def test_handles_invalid_result(self):
+        """Should return empty fields for malformed agent results."""
+        extracted = AgentOutputExtractor.extract_all(None, "")
+        assert extracted.sql == ""
+        assert extracted.vector_calls == []
+        assert extracted.amounts == []
+        assert extracted.transaction_ids == []
@@ -2,10 +2,22 @@
 Tests for the data ingestion utilities.
 
 These tests validate column name cleaning and normalization
-for SQL-friendly table creation.
+for SQL-friendly table creation, and the SQLite bulk load.
 """
 
-from src.ingest_sql import clean_column_name
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import src.ingest_sql
+from src.ingest_sql import (
+    clean_column_name,
+    read_transactions_csv,
+    sqlite_type,
+    to_iso_date,
+    write_transactions,
+)
 
 
 class TestCleanColumnName:
@@ -79,3 +91,133 @@ class TestCleanColumnName:
         """Should preserve intentional underscores."""
         assert clean_column_name("first_name") == "first_name"
         assert clean_column_name("last_name") == "last_name"
+
+
+class TestToIsoDate:
+    """Test conversion of DD/MM/YYYY dates to sortable ISO dates."""
+
+    def test_converts_dates_with_and_without_time(self):
+        """Day-first dates should become YYYY-MM-DD, dropping the time."""
+        dates = pd.Series(["01/06/2023 0:00", "28/07/2023", "13/09/2023 0:00"])
+        assert to_iso_date(dates).tolist() == [
+            "2023-06-01",
+            "2023-07-28",
+            "2023-09-13",
+        ]
+
+    def test_iso_dates_sort_chronologically(self):
+        """Converted dates should order by time, not by day of month."""
+        dates = pd.Series(["02/06/2023", "01/07/2023"])
+        assert sorted(to_iso_date(dates)) == ["2023-06-02", "2023-07-01"]
+
+
+class TestReadTransactionsCsv:
+    """Test that the CSV is read with the same column types by every parser."""
+
+    CSV = (
+        "Clnt_ID,bank_id,acc_id,txn_id,txn_date,desc,amt,cat,merchant\n"
+        "880,872,1004,114224,01/06/2023 0:00,Coffee,-3,Restaurants,\n"
+        "880,952,1090,46120,01/06/2023 0:00,Payroll,1500,Income,\n"
+    )
+
+    @pytest.mark.parametrize("engine", ["c", "pyarrow"])
+    def test_column_types_independent_of_engine(self, tmp_path, monkeypatch, engine):
+        """IDs, amounts and an all-empty merchant column get fixed types."""
+        if engine == "pyarrow":
+            pytest.importorskip("pyarrow")
+        monkeypatch.setattr(src.ingest_sql, "_CSV_ENGINE", engine)
+        csv_path = tmp_path / "data.csv"
+        csv_path.write_text(self.CSV)
+
+        df = read_transactions_csv(csv_path)
+        assert [sqlite_type(dtype) for dtype in df.dtypes] == [
+            "INTEGER",
+            "INTEGER",
+            "INTEGER",
+            "INTEGER",
+            "TEXT",
+            "TEXT",
+            "REAL",
+            "TEXT",
+            "TEXT",
+        ]
+        assert df["merchant"].isna().all()
+
+    @pytest.mark.parametrize("engine", ["c", "pyarrow"])
+    def test_missing_id_is_read_as_null(self, tmp_path, monkeypatch, engine):
+        """A blank ID keeps the column integer and is written as NULL."""
+        if engine == "pyarrow":
+            pytest.importorskip("pyarrow")
+        monkeypatch.setattr(src.ingest_sql, "_CSV_ENGINE", engine)
+        csv_path = tmp_path / "data.csv"
+        csv_path.write_text(self.CSV + ",952,1090,46121,02/06/2023 0:00,Tea,-1,Food,\n")
+
+        df = read_transactions_csv(csv_path)
+        assert sqlite_type(df["Clnt_ID"].dtype) == "INTEGER"
+
+        db_path = tmp_path / "transactions.db"
+        write_transactions(df, db_path)
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute("SELECT Clnt_ID FROM transactions").fetchall()
+        conn.close()
+        assert rows == [(880,), (880,), (None,)]
+
+
+class TestWriteTransactions:
+    """Test bulk loading a DataFrame into the transactions table."""
+
+    @staticmethod
+    def _frame():
+        return pd.DataFrame(
+            {
+                "clnt_id": [880, 880],
+                "desc": ["Coffee", None],
+                "amt": [-2.22, float("nan")],
+            }
+        )
+
+    def test_maps_dtypes_to_sqlite_types(self):
+        """Integer, float and text columns should get matching SQLite types."""
+        df = self._frame()
+        assert [sqlite_type(dtype) for dtype in df.dtypes] == [
+            "INTEGER",
+            "TEXT",
+            "REAL",
+        ]
+
+    def test_writes_rows_with_nulls(self, tmp_path):
+        """Rows should be stored as-is, with missing values as NULL."""
+        db_path = tmp_path / "transactions.db"
+        write_transactions(self._frame(), db_path)
+
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute('SELECT clnt_id, "desc", amt FROM transactions').fetchall()
+        conn.close()
+        assert rows == [(880, "Coffee", -2.22), (880, None, None)]
+
+    def test_replaces_existing_table(self, tmp_path):
+        """Re-ingesting should replace the table rather than append."""
+        db_path = tmp_path / "transactions.db"
+        write_transactions(self._frame(), db_path)
+        write_transactions(self._frame().head(1), db_path)
+
+        conn = sqlite3.connect(db_path)
+        (count,) = conn.execute("SELECT COUNT(*) FROM transactions").fetchone()
+        conn.close()
+        assert count == 1
+
+    def test_creates_indexes_for_present_columns(self, tmp_path):
+        """Indexes should be built only where all their columns exist."""
+        db_path = tmp_path / "transactions.db"
+        df = self._frame().assign(cat=["Restaurants", "Payroll"])
+        write_transactions(df, db_path)
+
+        conn = sqlite3.connect(db_path)
+        indexes = {
+            name
+            for (name,) in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )
+        }
+        conn.close()
+        assert indexes == {"idx_clnt_cat"}
@@ -0,0 +1,92 @@
+"""
+Tests for regenerating golden outputs from golden SQL.
+
+These tests validate that golden outputs and the expected values derived
+from them are rebuilt from the current database.
+"""
+
+import pytest
+
+from evaluation.refresh_golden import refresh_golden_outputs
+from evaluation.tier1_functional import FunctionalEvaluator
+
+
+@pytest.fixture
+def evaluator(transactions_db_path):
+    """FunctionalEvaluator over the small transactions table."""
+    evaluator = FunctionalEvaluator(transactions_db_path)
+    yield evaluator
+    evaluator.close()
+
+
+class TestRefreshGoldenOutputs:
+    """Test rebuilding test case outputs from the database."""
+
+    def test_rebuilds_rows_and_txn_ids(self, evaluator):
+        """Stale rows and ids are replaced by what golden_sql returns now."""
+        test_case = {
+            "test_id": "TC1",
+            "golden_sql": "SELECT txn_id, amt FROM transactions WHERE clnt_id = 880 "
+            "AND amt < 0 ORDER BY amt, txn_id",
+            "golden_output": [{"txn_id": 99, "amt": -1.0}],
+            "expected_txn_ids": [99],
+        }
+        refresh_golden_outputs([test_case], evaluator)
+        assert test_case["golden_output"] == [
+            {"txn_id": 2, "amt": -3.29},
+            {"txn_id": 1, "amt": -2.22},
+        ]
+        assert test_case["expected_txn_ids"] == [2, 1]
+
+    def test_updates_expected_amounts(self, evaluator):
+        """Single-value and spending/income results update their expectations."""
+        total = {
+            "test_id": "TC1",
+            "golden_sql": "SELECT SUM(amt) FROM transactions WHERE clnt_id = 880",
+            "golden_output": [],
+            "expected_amount": 0.0,
+        }
+        split = {
+            "test_id": "TC2",
+            "golden_sql": "SELECT SUM(CASE WHEN amt > 0 THEN amt ELSE 0 END) AS total_income, "
+            "SUM(CASE WHEN amt < 0 THEN amt ELSE 0 END) AS total_spending "
+            "FROM transactions WHERE clnt_id = 880",
+            "golden_output": [],
+            "expected_spending": 0.0,
+            "expected_income": 0.0,
+        }
+        refresh_golden_outputs([total, split], evaluator)
+        assert total["expected_amount"] == pytest.approx(1494.49)
+        assert split["expected_income"] == 1500.0
+        assert split["expected_spending"] == pytest.approx(-5.51)
+
+    def test_leaves_absent_fields_alone(self, evaluator):
+        """Only fields a test case already has are derived."""
+        test_case = {
+            "test_id": "TC1",
+            "golden_sql": "SELECT txn_id FROM transactions WHERE clnt_id = 999",
+            "golden_output": [],
+        }
+        refresh_golden_outputs([test_case], evaluator)
+        assert test_case == {
+            "test_id": "TC1",
+            "golden_sql": "SELECT txn_id FROM transactions WHERE clnt_id = 999",
+            "golden_output": [{"txn_id": 4}],
+        }
+
+    def test_clears_pending_marker(self, evaluator):
+        """A case marked as awaiting regeneration is unmarked once rebuilt."""
+        test_case = {
+            "test_id": "TC1",
+            "golden_sql": "SELECT txn_id FROM transactions WHERE clnt_id = 999",
+            "golden_output": [],
+            "golden_pending_regeneration": True,
+        }
+        refresh_golden_outputs([test_case], evaluator)
+        assert "golden_pending_regeneration" not in test_case
+
+    def test_sql_error_raises(self, evaluator):
+        """A broken golden query is reported with its test id."""
+        test_case = {"test_id": "TC9", "golden_sql": "SELECT nope FROM transactions"}
+        with pytest.raises(ValueError, match="TC9"):
+            refresh_golden_outputs([test_case], evaluator)
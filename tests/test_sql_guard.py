@@ -0,0 +1,140 @@
+"""
+Tests for the sql_db_query client_id gate.
+
+These tests validate that the gate only accepts a clnt_id filter written
+in real SQL that actually restricts the query's rows.
+"""
+
+import pytest
+
+from src.sql_guard import has_client_filter, mask_sql
+
+
+class TestMaskSql:
+    """Test blanking of literals, identifiers and comments."""
+
+    def test_blanks_string_literals(self):
+        """String literal contents are removed."""
+        assert mask_sql("WHERE desc = 'clnt_id = 880'") == "WHERE desc = ''"
+
+    def test_quote_inside_identifier_stays_in_step(self):
+        """A single quote inside a double-quoted identifier is not a literal."""
+        sql = "SELECT \"a'\" FROM t WHERE clnt_id = 880 AND x = '\"'"
+        assert mask_sql(sql) == "SELECT _ident FROM t WHERE clnt_id = 880 AND x = ''"
+
+    def test_plain_quoted_identifier_keeps_name(self):
+        """A quoted column name still names the column."""
+        assert mask_sql('WHERE "clnt_id" = 880') == "WHERE clnt_id = 880"
+
+    def test_bracket_and_backtick_identifiers(self):
+        """[...] and `...` identifiers are handled like "..." ones."""
+        assert mask_sql("SELECT [a b], `c'd` FROM t") == "SELECT _ident, _ident FROM t"
+
+    def test_removes_comments(self):
+        """Line and block comments are removed."""
+        assert "clnt_id" not in mask_sql("SELECT 1 -- clnt_id = 880\n")
+        assert "clnt_id" not in mask_sql("SELECT 1 /* clnt_id = 880 */")
+
+
+class TestHasClientFilter:
+    """Test the clnt_id filter check used by sql_db_query."""
+
+    @pytest.mark.parametrize(
+        "sql",
+        [
+            "SELECT * FROM transactions WHERE clnt_id = 880",
+            "SELECT * FROM transactions WHERE clnt_id=880 AND cat = 'Food'",
+            "SELECT * FROM transactions WHERE clnt_id IN (880)",
+            'SELECT * FROM transactions WHERE "clnt_id" = 880',
+            "SELECT * FROM transactions t WHERE t.clnt_id = 880 ORDER BY txn_date",
+            "SELECT * FROM transactions WHERE clnt_id = 880 AND (cat = 'a' OR cat = 'b')",
+            "SELECT * FROM transactions WHERE (cat = 'a' OR cat = 'b') AND clnt_id = 880",
+            "SELECT cat FROM transactions WHERE clnt_id = 880 AND desc LIKE '%or%'",
+            'SELECT 1 AS "x\'" FROM transactions WHERE clnt_id = 880',
+            "SELECT * FROM transactions WHERE (clnt_id = 880) AND amt < 0",
+            "SELECT cat, SUM(amt) FROM transactions WHERE clnt_id = 880 GROUP BY cat",
+        ],
+    )
+    def test_accepts_real_filter(self, sql):
+        """A clnt_id filter in the query's conditions is accepted."""
+        assert has_client_filter(sql, 880)
+
+    @pytest.mark.parametrize(
+        "sql",
+        [
+            "SELECT * FROM transactions",
+            "SELECT * FROM transactions WHERE merchant = 'brand880'",
+            "SELECT * FROM transactions WHERE clnt_id = 8800",
+            "SELECT * FROM transactions WHERE clnt_id = 999",
+        ],
+    )
+    def test_rejects_missing_filter(self, sql):
+        """Queries without the client's filter are rejected."""
+        assert not has_client_filter(sql, 880)
+
+    def test_rejects_filter_inside_string_literal(self):
+        """A filter quoted inside a string value does not count."""
+        sql = (
+            "SELECT * FROM transactions WHERE clnt_id = 999 OR desc != 'clnt_id = 880'"
+        )
+        assert not has_client_filter(sql, 880)
+
+    def test_rejects_filter_inside_comment_or_identifier(self):
+        """A filter inside a comment or quoted identifier does not count."""
+        assert not has_client_filter("SELECT * FROM t -- clnt_id = 880", 880)
+        assert not has_client_filter('SELECT "clnt_id = 880" FROM t', 880)
+
+    @pytest.mark.parametrize(
+        "sql",
+        [
+            "SELECT * FROM transactions WHERE clnt_id = 880 OR 1=1",
+            "SELECT * FROM transactions WHERE cat = 'a' OR clnt_id = 880",
+            "SELECT * FROM transactions WHERE clnt_id = 880 AND cat = 'a' OR cat = 'b'",
+            "SELECT * FROM transactions WHERE (clnt_id = 880 OR 1=1)",
+        ],
+    )
+    def test_rejects_top_level_or(self, sql):
+        """An OR beside the filter lets other clients' rows through."""
+        assert not has_client_filter(sql, 880)
+
+    def test_rejects_negated_filter(self):
+        """NOT clnt_id = N selects every other client."""
+        sql = "SELECT * FROM transactions WHERE NOT clnt_id = 880"
+        assert not has_client_filter(sql, 880)
+
+    def test_quote_inside_identifier_does_not_hide_filter(self):
+        """An identifier quote must not throw the literal scanner out of step."""
+        sql = (
+            'SELECT 1 AS "x\'" FROM transactions WHERE clnt_id = 880 '
+            'AND amt IN (SELECT amt FROM "\'" WHERE 1)'
+        )
+        assert has_client_filter(sql, 880)
+
+    @pytest.mark.parametrize(
+        "sql",
+        [
+            "SELECT * FROM transactions WHERE (clnt_id = 880) OR 1=1",
+            "SELECT * FROM transactions WHERE (clnt_id = 880 AND amt<0) OR amt>0",
+            "SELECT * FROM transactions WHERE NOT (clnt_id = 880)",
+        ],
+    )
+    def test_rejects_or_around_enclosing_group(self, sql):
+        """An OR or NOT at any level up to the WHERE defeats the filter."""
+        assert not has_client_filter(sql, 880)
+
+    def test_rejects_compound_select(self):
+        """A UNION adds rows the filter does not cover."""
+        sql = "SELECT * FROM transactions WHERE clnt_id = 880 UNION SELECT * FROM transactions"
+        assert not has_client_filter(sql, 880)
+
+    @pytest.mark.parametrize(
+        "sql",
+        [
+            "SELECT * FROM transactions WHERE amt IN (SELECT amt FROM transactions WHERE clnt_id = 880)",
+            "SELECT * FROM transactions t JOIN transactions u ON u.clnt_id = 880",
+            "SELECT *, (SELECT 1 WHERE clnt_id = 880) FROM transactions",
+        ],
+    )
+    def test_rejects_filter_outside_outer_where(self, sql):
+        """A filter in a subquery, ON clause or select list does not bind."""
+        assert not has_client_filter(sql, 880)
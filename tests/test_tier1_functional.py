@@ -5,8 +5,16 @@ These tests validate SQL security compliance, result comparison,
 and the detection of SQL injection patterns and dangerous operations.
 """
 
+import sqlite3
+
 import pytest
 
+from evaluation.tier1_functional import (
+    _HS_DATABASE,
+    _find_violation_hyperscan,
+    _find_violation_re,
+)
+
 from .conftest import (
     SECURITY_TEST_CASES_VALID,
     SECURITY_TEST_CASES_INJECTION,
@@ -21,37 +29,69 @@ class TestSecurityComplianceValid:
     @pytest.mark.parametrize(
         "test_case",
         SECURITY_TEST_CASES_VALID,
-        ids=[tc["name"] for tc in SECURITY_TEST_CASES_VALID],
+        ids=[tc.name for tc in SECURITY_TEST_CASES_VALID],
     )
     def test_valid_queries_pass(self, functional_evaluator, test_case):
         """Valid queries with proper client_id should pass."""
         score, detail = functional_evaluator.evaluate_security_compliance(
-            test_case["sql"], test_case["client_id"]
+            test_case.sql, test_case.client_id
         )
-        assert score == test_case["expected_score"], (
-            f"Failed: {test_case['name']}, detail: {detail}"
+        assert score == test_case.expected_score, (
+            f"Failed: {test_case.name}, detail: {detail}"
         )
         assert "passed" in detail.lower(), f"Expected 'passed' in detail: {detail}"
 
 
+class TestSecurityComplianceBatch:
+    """Test scoring many queries in one call."""
+
+    def test_batch_matches_single_calls(self, functional_evaluator):
+        """Batch verdicts should equal per-query verdicts, in order."""
+        cases = (
+            SECURITY_TEST_CASES_VALID
+            + SECURITY_TEST_CASES_INJECTION
+            + SECURITY_TEST_CASES_DANGEROUS
+            + SECURITY_TEST_CASES_MISSING_CLIENT
+        )
+        verdicts = functional_evaluator.evaluate_security_compliance_batch(
+            [(tc.sql, tc.client_id) for tc in cases]
+        )
+
+        assert [score for score, _ in verdicts] == [tc.expected_score for tc in cases]
+        assert verdicts == [
+            functional_evaluator.evaluate_security_compliance(tc.sql, tc.client_id)
+            for tc in cases
+        ]
+
+    def test_comment_split_across_queries_not_flagged(self, functional_evaluator):
+        """Patterns must not match across the boundary between two queries."""
+        # Each query carries half of a /* ... */ pair that would match if the
+        # queries were concatenated
+        verdicts = functional_evaluator.evaluate_security_compliance_batch(
+            [
+                ("SELECT * FROM transactions WHERE clnt_id = 880 AND x = '/*'", 880),
+                ("SELECT * FROM transactions WHERE clnt_id = 880 AND x = '*/'", 880),
+            ]
+        )
+        assert [score for score, _ in verdicts] == [1.0, 1.0]
+
+
 class TestSecurityComplianceInjection:
     """Test that SQL injection patterns are blocked."""
 
     @pytest.mark.parametrize(
         "test_case",
         SECURITY_TEST_CASES_INJECTION,
-        ids=[tc["name"] for tc in SECURITY_TEST_CASES_INJECTION],
+        ids=[tc.name for tc in SECURITY_TEST_CASES_INJECTION],
     )
     def test_injection_patterns_blocked(self, functional_evaluator, test_case):
         """SQL injection patterns should be detected and blocked."""
         score, detail = functional_evaluator.evaluate_security_compliance(
-            test_case["sql"], test_case["client_id"]
+            test_case.sql, test_case.client_id
         )
-        assert score == test_case["expected_score"], (
-            f"Failed to block: {test_case['name']}"
-        )
-        assert test_case["detail_contains"].lower() in detail.lower(), (
-            f"Expected '{test_case['detail_contains']}' in detail: {detail}"
+        assert score == test_case.expected_score, f"Failed to block: {test_case.name}"
+        assert test_case.detail_contains.lower() in detail.lower(), (
+            f"Expected '{test_case.detail_contains}' in detail: {detail}"
         )
 
 
@@ -61,18 +101,16 @@ class TestSecurityComplianceDangerous:
     @pytest.mark.parametrize(
         "test_case",
         SECURITY_TEST_CASES_DANGEROUS,
-        ids=[tc["name"] for tc in SECURITY_TEST_CASES_DANGEROUS],
+        ids=[tc.name for tc in SECURITY_TEST_CASES_DANGEROUS],
     )
     def test_dangerous_operations_blocked(self, functional_evaluator, test_case):
         """Dangerous operations (DROP, DELETE, etc.) should be blocked."""
         score, detail = functional_evaluator.evaluate_security_compliance(
-            test_case["sql"], test_case["client_id"]
-        )
-        assert score == test_case["expected_score"], (
-            f"Failed to block: {test_case['name']}"
+            test_case.sql, test_case.client_id
         )
-        assert test_case["detail_contains"].lower() in detail.lower(), (
-            f"Expected '{test_case['detail_contains']}' in detail: {detail}"
+        assert score == test_case.expected_score, f"Failed to block: {test_case.name}"
+        assert test_case.detail_contains.lower() in detail.lower(), (
+            f"Expected '{test_case.detail_contains}' in detail: {detail}"
         )
 
 
@@ -82,16 +120,14 @@ class TestSecurityComplianceMissingClient:
     @pytest.mark.parametrize(
         "test_case",
         SECURITY_TEST_CASES_MISSING_CLIENT,
-        ids=[tc["name"] for tc in SECURITY_TEST_CASES_MISSING_CLIENT],
+        ids=[tc.name for tc in SECURITY_TEST_CASES_MISSING_CLIENT],
     )
     def test_missing_client_id_blocked(self, functional_evaluator, test_case):
         """Queries without proper client_id filtering should be blocked."""
         score, detail = functional_evaluator.evaluate_security_compliance(
-            test_case["sql"], test_case["client_id"]
-        )
-        assert score == test_case["expected_score"], (
-            f"Failed to block: {test_case['name']}"
+            test_case.sql, test_case.client_id
         )
+        assert score == test_case.expected_score, f"Failed to block: {test_case.name}"
         # Detail should mention missing or incorrect client_id
         assert any(word in detail.lower() for word in ["missing", "incorrect"]), (
             f"Expected 'missing' or 'incorrect' in detail: {detail}"
@@ -148,6 +184,199 @@ class TestResultComparison:
         result2 = [{"amt": 100.0}, {"amt": 200.0}]
         assert functional_evaluator._compare_results(result1, result2) is True
 
+    def test_same_columns_different_values_dont_match(self, functional_evaluator):
+        """Rows sharing column names still have their values compared."""
+        result1 = [{"cat": "Food", "amt": 100.0}, {"cat": "Rent", "amt": -900.0}]
+        result2 = [{"cat": "Food", "amt": 100.0}, {"cat": "Rent", "amt": -901.0}]
+        assert functional_evaluator._compare_results(result1, result2) is False
+
+    def test_same_columns_fall_back_to_values(self, functional_evaluator):
+        """As with differing aliases, values are compared ignoring column names."""
+        result1 = [{"income": 100.0, "spending": -50.0}]
+        result2 = [{"income": -50.0, "spending": 100.0}]
+        assert functional_evaluator._compare_results(result1, result2) is True
+
+    def test_unordered_results_with_nulls_match(self, functional_evaluator):
+        """Rows mixing None and numbers should still compare order-independently."""
+        result1 = [{"merchant": None, "amt": -3.29}, {"merchant": "KFC", "amt": -2.22}]
+        result2 = [{"merchant": "KFC", "amt": -2.22}, {"merchant": None, "amt": -3.29}]
+        assert functional_evaluator._compare_results(result1, result2) is True
+
+    def test_duplicate_row_counts_must_match(self, functional_evaluator):
+        """Rows are compared as multisets, so duplicate counts matter."""
+        result1 = [{"amt": 100.0}, {"amt": 100.0}, {"amt": 200.0}]
+        result2 = [{"amt": 100.0}, {"amt": 200.0}, {"amt": 200.0}]
+        assert functional_evaluator._compare_results(result1, result2) is False
+
+    def test_unordered_aliased_rows_match(self, functional_evaluator):
+        """Aliased columns should match across rows in a different order."""
+        result1 = [{"cat": "Food", "total": -5.0}, {"cat": "Rent", "total": -900.0}]
+        result2 = [
+            {"category": "Rent", "sum": -900.0},
+            {"category": "Food", "sum": -5.0},
+        ]
+        assert functional_evaluator._compare_results(result1, result2) is True
+
+
+class TestLargeResultComparison:
+    """Test the NumPy comparison path for large numeric result sets."""
+
+    @staticmethod
+    def _rows(n):
+        return [{"txn_id": i, "amt": round(-i * 1.25, 2)} for i in range(n)]
+
+    def test_unordered_numeric_results_match(self, functional_evaluator):
+        """Large numeric results should match regardless of row order."""
+        rows = self._rows(200)
+        assert functional_evaluator._compare_results(rows, rows[::-1]) is True
+
+    def test_numeric_value_difference_detected(self, functional_evaluator):
+        """A single differing value in a large result should not match."""
+        rows = self._rows(200)
+        changed = [dict(r) for r in rows]
+        changed[150]["amt"] += 0.5
+        assert functional_evaluator._compare_results(rows, changed) is False
+
+    def test_float_rounding_tolerance(self, functional_evaluator):
+        """The NumPy path should keep the 2-decimal-place normalization."""
+        rows = self._rows(200)
+        jittered = [{"txn_id": r["txn_id"], "amt": r["amt"] + 0.001} for r in rows]
+        assert functional_evaluator._compare_results(rows, jittered) is True
+
+    @pytest.mark.parametrize("n", [64, 65])
+    def test_rounding_same_on_both_sides_of_threshold(self, functional_evaluator, n):
+        """Half-cent values should round like round(v, 2) at any row count."""
+        rows1 = [{"txn_id": i, "amt": 336.845} for i in range(n)]
+        rows2 = [{"txn_id": i, "amt": 336.85} for i in range(n)]
+        assert functional_evaluator._compare_results(rows1, rows2) is True
+
+    def test_half_cents_match_round(self, functional_evaluator):
+        """Integer cents agree with round(v, 2) on every half-cent value."""
+        amounts = [i / 1000 for i in range(5, 400_000, 10)]
+        rows1 = [{"amt": v} for v in amounts]
+        rows2 = [{"amt": round(v, 2)} for v in amounts]
+        assert functional_evaluator._compare_numeric_rows(rows1, rows2) is True
+
+    def test_single_column_results(self, functional_evaluator):
+        """One-column numeric results should use the NumPy path too."""
+        rows = [{"amt": i * 1.5} for i in range(100)]
+        assert functional_evaluator._compare_numeric_rows(rows, rows[::-1]) is True
+
+    def test_large_ints_compared_exactly(self, functional_evaluator):
+        """Ints beyond float64 precision must not collapse into equal values."""
+        rows1 = [{"txn_id": 2**60 + i, "amt": 1.0} for i in range(100)]
+        rows2 = [{"txn_id": 2**60 + i + 1, "amt": 1.0} for i in range(100)]
+        assert functional_evaluator._compare_results(rows1, rows2) is False
+        assert functional_evaluator._compare_numeric_rows(rows1, rows2) is None
+
+    def test_column_order_ignored(self, functional_evaluator):
+        """Rows listing the same columns in another order should match."""
+        rows = self._rows(200)
+        swapped = [{"amt": r["amt"], "txn_id": r["txn_id"]} for r in rows]
+        assert functional_evaluator._compare_results(rows, swapped) is True
+
+    def test_nulls_fall_back_to_row_comparison(self, functional_evaluator):
+        """None values are not coerced to NaN by the NumPy path."""
+        rows = self._rows(200)
+        rows[10]["amt"] = None
+        assert functional_evaluator._compare_results(rows, rows[::-1]) is True
+        assert functional_evaluator._compare_numeric_rows(rows, rows) is None
+
+
+class TestExecutionAccuracy:
+    """Test SQL execution against a populated database."""
+
+    @pytest.fixture
+    def evaluator(self, transactions_db_path):
+        from evaluation.tier1_functional import FunctionalEvaluator
+
+        evaluator = FunctionalEvaluator(transactions_db_path)
+        yield evaluator
+        evaluator.close()
+
+    def test_matching_results_pass(self, evaluator):
+        """Equivalent queries with different aliases should score 1.0."""
+        score, detail = evaluator.evaluate_execution_accuracy(
+            "SELECT SUM(amt) AS total FROM transactions WHERE clnt_id = 880 AND amt < 0",
+            "SELECT SUM(amt) FROM transactions WHERE clnt_id = 880 AND amt < 0",
+        )
+        assert score == 1.0, detail
+
+    def test_no_read_lock_held_between_queries(self, evaluator, transactions_db_path):
+        """A writer must not be blocked by an evaluator that has run a query."""
+        evaluator.execute_sql("SELECT * FROM transactions")
+        writer = sqlite3.connect(transactions_db_path, timeout=0)
+        try:
+            with writer:
+                writer.execute("DELETE FROM transactions WHERE clnt_id = 999")
+        finally:
+            writer.close()
+
+    def test_mismatched_results_fail(self, evaluator):
+        """Queries returning different rows should score 0.0."""
+        score, detail = evaluator.evaluate_execution_accuracy(
+            "SELECT txn_id FROM transactions WHERE clnt_id = 999",
+            "SELECT txn_id FROM transactions WHERE clnt_id = 880",
+        )
+        assert score == 0.0
+        assert "mismatch" in detail.lower()
+
+    def test_generated_sql_error_reported(self, evaluator):
+        """Invalid generated SQL should fail with the database error."""
+        score, detail = evaluator.evaluate_execution_accuracy(
+            "SELECT nope FROM transactions",
+            "SELECT txn_id FROM transactions WHERE clnt_id = 880",
+        )
+        assert score == 0.0
+        assert "failed" in detail.lower()
+
+    def test_golden_sql_executed_once(self, evaluator):
+        """Golden SQL results should be served from cache on repeat calls."""
+        generated_sql = "SELECT txn_id AS id FROM transactions WHERE clnt_id = 880"
+        golden_sql = "SELECT txn_id FROM transactions WHERE clnt_id = 880"
+        for _ in range(3):
+            evaluator.evaluate_execution_accuracy(generated_sql, golden_sql)
+        info = evaluator._query_cached.cache_info()
+        assert info.misses == 1
+        assert info.hits == 2
+
+    def test_golden_results_persist_across_evaluators(
+        self, transactions_db_path, tmp_path
+    ):
+        """With a cache_dir, a new evaluator reuses golden results from disk."""
+        from evaluation.tier1_functional import FunctionalEvaluator
+
+        golden_sql = "SELECT txn_id FROM transactions WHERE clnt_id = 880"
+        first = FunctionalEvaluator(transactions_db_path, cache_dir=str(tmp_path))
+        expected = first.execute_sql(golden_sql, cache=True)
+        first.close()
+
+        second = FunctionalEvaluator(transactions_db_path, cache_dir=str(tmp_path))
+        second._query = None  # Any database access would now raise
+        try:
+            assert second.execute_sql(golden_sql, cache=True) == expected
+        finally:
+            second.close()
+
+    def test_identical_sql_skips_execution(self, evaluator):
+        """SQL differing only in whitespace, keyword case or ';' is not executed."""
+        score, detail = evaluator.evaluate_execution_accuracy(
+            "select txn_id\n  from transactions where clnt_id = 880;",
+            "SELECT txn_id FROM transactions WHERE clnt_id = 880",
+        )
+        assert score == 1.0
+        assert "skipped" in detail.lower()
+        assert evaluator._query_cached.cache_info().misses == 0
+
+    def test_literal_case_difference_is_executed(self, evaluator):
+        """String literals are compared verbatim, so case changes still execute."""
+        score, detail = evaluator.evaluate_execution_accuracy(
+            "SELECT txn_id FROM transactions WHERE cat = 'restaurants'",
+            "SELECT txn_id FROM transactions WHERE cat = 'Restaurants'",
+        )
+        assert score == 0.0
+        assert "mismatch" in detail.lower()
+
 
 class TestAdditionalSecurityPatterns:
     """Test additional SQL injection and security patterns."""
@@ -165,6 +394,58 @@ class TestAdditionalSecurityPatterns:
         score, detail = functional_evaluator.evaluate_security_compliance(sql, 880)
         assert score == 0.0
 
+    def test_dangerous_keywords_inside_literals_allowed(self, functional_evaluator):
+        """Dangerous keywords inside string values are just data."""
+        sql = "SELECT * FROM transactions WHERE clnt_id = 880 AND merchant = 'DROP TABLE shop'"
+        score, detail = functional_evaluator.evaluate_security_compliance(sql, 880)
+        assert score == 1.0, detail
+
+    def test_injection_keywords_inside_literals_allowed(self, functional_evaluator):
+        """Injection patterns other than comments ignore string values."""
+        sql = "SELECT * FROM transactions WHERE clnt_id = 880 AND desc = 'x UNION SELECT y'"
+        score, detail = functional_evaluator.evaluate_security_compliance(sql, 880)
+        assert score == 1.0, detail
+
+    def test_comment_marker_inside_literal_still_blocked(self, functional_evaluator):
+        """Comment and injection patterns are scanned on the raw SQL."""
+        sql = "SELECT * FROM transactions WHERE clnt_id = 880 AND desc LIKE '%--%'"
+        score, detail = functional_evaluator.evaluate_security_compliance(sql, 880)
+        assert score == 0.0
+        assert "comment" in detail.lower()
+
+    def test_quote_inside_identifier_does_not_hide_update(self, functional_evaluator):
+        """A quote inside a double-quoted identifier must not mask later SQL."""
+        sql = (
+            'SELECT "a\'" FROM transactions; '
+            'UPDATE transactions SET amt = 0 WHERE "\'" = 1 AND clnt_id = 880'
+        )
+        score, detail = functional_evaluator.evaluate_security_compliance(sql, 880)
+        assert score == 0.0
+        assert "(UPDATE)" in detail
+
+    def test_quote_inside_identifier_keeps_client_filter(self, functional_evaluator):
+        """A quote inside a double-quoted identifier must not hide clnt_id."""
+        sql = (
+            'SELECT 1 AS "x\'" FROM transactions WHERE clnt_id = 880 '
+            'AND amt IN (SELECT amt FROM "\'" WHERE 1)'
+        )
+        score, detail = functional_evaluator.evaluate_security_compliance(sql, 880)
+        assert score == 1.0, detail
+
+    def test_client_id_inside_literal_rejected(self, functional_evaluator):
+        """A clnt_id filter quoted inside a string value does not count."""
+        sql = "SELECT * FROM transactions WHERE desc = 'clnt_id = 880'"
+        score, detail = functional_evaluator.evaluate_security_compliance(sql, 880)
+        assert score == 0.0
+        assert "missing" in detail.lower()
+
+    def test_quote_based_or_injection_still_blocked(self, functional_evaluator):
+        """OR injections built from quoted strings are blocked."""
+        sql = "SELECT * FROM transactions WHERE clnt_id = 880 AND desc = 'x' OR 'a'='a'"
+        score, detail = functional_evaluator.evaluate_security_compliance(sql, 880)
+        assert score == 0.0
+        assert "injection" in detail.lower()
+
     def test_client_id_in_subquery(self, functional_evaluator):
         """Client ID in proper WHERE clause should pass."""
         sql = "SELECT * FROM transactions WHERE clnt_id = 880 AND amt IN (SELECT amt FROM other)"
@@ -185,3 +466,58 @@ class TestAdditionalSecurityPatterns:
         score, detail = functional_evaluator.evaluate_security_compliance(sql, 880)
         assert score == 0.0
         assert "dangerous" in detail.lower()
+
+
+class TestRegexSecurityFallback:
+    """Test the `re` scanner used when hyperscan is not installed."""
+
+    @pytest.mark.parametrize(
+        "test_case",
+        SECURITY_TEST_CASES_INJECTION + SECURITY_TEST_CASES_DANGEROUS,
+        ids=[
+            tc.name
+            for tc in SECURITY_TEST_CASES_INJECTION + SECURITY_TEST_CASES_DANGEROUS
+        ],
+    )
+    def test_unsafe_queries_detected(self, test_case):
+        """Injection and dangerous patterns should be detected without hyperscan."""
+        detail = _find_violation_re(test_case.sql)
+        assert detail is not None, f"Failed to detect: {test_case.name}"
+        assert test_case.detail_contains.lower() in detail.lower()
+
+    @pytest.mark.parametrize(
+        "test_case",
+        SECURITY_TEST_CASES_VALID,
+        ids=[tc.name for tc in SECURITY_TEST_CASES_VALID],
+    )
+    def test_valid_queries_not_flagged(self, test_case):
+        """Valid queries should not be flagged by the fallback scanner."""
+        assert _find_violation_re(test_case.sql) is None
+
+    @pytest.mark.parametrize(
+        "sql, label",
+        [
+            ("DELETE FROM t; UPDATE x SET a = 1", "UPDATE"),
+            ("SELECT 1 FROM t WHERE clnt_id = 880 OR 1=1 --", "SQL comment injection"),
+            ("SELECT 1 FROM t WHERE clnt_id = 880 /* -- */", "SQL comment injection"),
+        ],
+    )
+    def test_label_precedence_matches_hyperscan(self, sql, label):
+        """The lowest-index pattern wins, not the leftmost match."""
+        detail = _find_violation_re(sql)
+        assert f"({label}" in detail
+        if _HS_DATABASE is not None:
+            assert _find_violation_hyperscan(sql) == detail
+
+    def test_lowercase_keywords_pass_prefilter(self):
+        """The keyword prefilter should not hide lowercase statements."""
+        detail = _find_violation_re("drop table transactions")
+        assert detail is not None and "dangerous" in detail.lower()
+        detail = _find_violation_re("select * from t where clnt_id = 880 or 1=1")
+        assert detail is not None and "injection" in detail.lower()
+
+    def test_dangerous_keywords_checked_in_keyword_text(self):
+        """Dangerous operations are looked up in the masked text."""
+        sql = "SELECT 1 FROM t WHERE merchant = 'DROP TABLE shop'"
+        assert _find_violation_re(sql, "SELECT 1 FROM t WHERE merchant = ''") is None
+        assert _find_violation_re(sql) is not None
@@ -154,6 +154,17 @@ class TestRetrievalRelevance:
 
         assert score == 1.0
 
+    def test_unicode_case_folding(self, retrieval_evaluator):
+        """Should match terms whose case forms differ in length."""
+        vector_calls = [{"query": "STRASSE cafe", "n_results": 15}]
+        test_case = {"expected_search_terms": ["straße"]}
+
+        score, detail = retrieval_evaluator.evaluate_retrieval_relevance(
+            vector_calls, test_case
+        )
+
+        assert score == 1.0
+
     def test_fails_when_no_vector_calls_but_terms_expected(self, retrieval_evaluator):
         """Should fail when terms expected but no vector search performed."""
         vector_calls = []
@@ -47,6 +47,18 @@ class TestFaithfulness:
         assert score == 0.0
         assert "placeholder" in detail.lower()
 
+    def test_reports_each_placeholder_once(self, response_evaluator):
+        """Placeholders match case-insensitively and are reported once each."""
+        response = "Spent $x.xx, then $X.XX on [Transaction] and [transaction]"
+        score, detail = response_evaluator.evaluate_faithfulness(
+            response, golden_output=[], transaction_ids=[]
+        )
+        assert score == 0.0
+        assert detail == (
+            "Faithfulness violations: Contains placeholder: $X.XX; "
+            "Contains placeholder: [transaction"
+        )
+
     def test_detects_fabricated_sequential_ids(self, response_evaluator):
         """Should detect fabricated sequential transaction IDs."""
         response = "Transactions: 1, 2, 3, 4, 5"
@@ -117,6 +129,10 @@ class TestSequentialDetection:
         """Large gaps between numbers should not be sequential."""
         assert ResponseEvaluator._is_sequential([1, 100, 200, 300, 400]) is False
 
+    def test_detects_sequential_with_duplicates(self):
+        """Repeated IDs should not hide a consecutive run."""
+        assert ResponseEvaluator._is_sequential([1, 2, 2, 3]) is True
+
 
 class TestAmountAccuracy:
     """Test amount validation in responses."""
@@ -215,6 +231,18 @@ class TestAmountAccuracy:
         )
         assert score == 1.0
 
+    def test_checks_long_amount_lists(self, response_evaluator):
+        """Long amount lists should report the same closest values."""
+        test_case = {"expected_spending": -500.0, "expected_income": 750.0}
+        score, detail = response_evaluator.evaluate_amount_accuracy(
+            response_amounts=[float(i) for i in range(-100, 100)],
+            test_case=test_case,
+            golden_output=[{"spending": -500.0, "income": 750.0}],
+        )
+        assert score == 0.0
+        assert "closest found $-100.00" in detail
+        assert "found $99.00" in detail
+
 
 class TestResponseEvaluatorIntegration:
     """Integration tests for response evaluation."""